@@ -14,6 +14,7 @@ driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 indexes = [
     "CREATE INDEX mandate_name IF NOT EXISTS FOR (m:Mandate) ON (m.name)",
     "CREATE INDEX person_name IF NOT EXISTS FOR (p:Person) ON (p.name)",
+    "CREATE INDEX person_entity_id IF NOT EXISTS FOR (p:Person) ON (p.entity_id)",
     "CREATE INDEX company_name IF NOT EXISTS FOR (c:ProductionCompany) ON (c.name)",
     "CREATE INDEX executive_name IF NOT EXISTS FOR (e:Executive) ON (e.name)",
     "CREATE INDEX greenlight_title IF NOT EXISTS FOR (g:Greenlight) ON (g.title)",
@@ -10,6 +10,12 @@ from pinecone import Pinecone
 from neo4j import GraphDatabase
 from sentence_transformers import SentenceTransformer
 
+METADATA_TEXT_BYTES = 1000
+
+def metadata_text(text, max_bytes=METADATA_TEXT_BYTES):
+    """Cut text to max_bytes of UTF-8 (Pinecone limits metadata by bytes, not characters)"""
+    return text.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+
 # Initialize
 print("Initializing...")
 
@@ -86,7 +92,7 @@ for exec_data in senior_execs:
             'title': title,
             'level': exec_data['level'],
             'scope': exec_data['scope'],
-            'text': mandate_text[:1000]  # Truncate for metadata
+            'text': metadata_text(mandate_text)
         }
     })
     
@@ -139,7 +145,7 @@ for competitor, data in comp_intel['netflix_vs_competitors'].items():
         'metadata': {
             'type': 'competitive_intelligence',
             'competitor': comp_name,
-            'text': comp_text[:1000]
+            'text': metadata_text(comp_text)
         }
     })
 
@@ -169,7 +175,7 @@ for project_type, timeline_info in timeline_data['by_project_type'].items():
         'metadata': {
             'type': 'timeline_intelligence',
             'project_type': project_type,
-            'text': timeline_text[:1000]
+            'text': metadata_text(timeline_text)
         }
     })
 
@@ -204,7 +210,7 @@ for genre, companies in prodco_data['production_companies_by_genre'].items():
                 'type': 'production_company_intelligence',
                 'name': company['name'],
                 'genre': genre,
-                'text': prodco_text[:1000]
+                'text': metadata_text(prodco_text)
             }
         })
 
@@ -235,7 +241,7 @@ index.upsert(vectors=[{
     'values': embedding,
     'metadata': {
         'type': 'packaging_intelligence',
-        'text': packaging_text[:1000]
+        'text': metadata_text(packaging_text)
     }
 }], namespace='packaging_intelligence')
 
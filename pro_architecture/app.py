@@ -5,7 +5,7 @@ from auth.auth_manager import AuthManager
 from auth.ghost_client import GhostClient
 from logging_service import get_logger
 from config import S
-import os, psutil, time
+import os, psutil, threading, time
 
 # Import migration endpoints
 try:
@@ -56,10 +56,13 @@ auth_manager = AuthManager()
 query_logger = get_logger()
 
 _engine = None
+_engine_lock = threading.Lock()
 def get_engine():
     global _engine
     if _engine is None:
-        _engine = Engine()
+        with _engine_lock:
+            if _engine is None:
+                _engine = Engine()
     return _engine
 
 @app.route("/healthz")
@@ -265,17 +268,15 @@ def answer():
                 streams_client = get_streams_client()
                 entities = out.get('entities', [])
                 
-                for entity in entities:
-                    entity_id = entity.get('id')
-                    entity_type = entity.get('type', 'unknown')
-                    
-                    if entity_id:
-                        streams_client.publish_query_signal(
-                            entity_id=entity_id,
-                            entity_type=entity_type,
-                            query=q,
-                            user_id=user_email
-                        )
+                # One pipelined round-trip for all of the answer's entities
+                streams_client.publish_query_signals(
+                    [
+                        {'entity_id': entity.get('id'), 'entity_type': entity.get('type', 'unknown')}
+                        for entity in entities if entity.get('id')
+                    ],
+                    query=q,
+                    user_id=user_email
+                )
             except Exception as stream_error:
                 # Don't fail the request if event publishing fails
                 print(f"⚠️ Failed to publish query signals: {stream_error}")
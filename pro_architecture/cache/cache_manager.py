@@ -10,6 +10,7 @@ import hashlib
 from typing import Any, Optional, Callable
 from functools import wraps
 import os
+from urllib.parse import urlencode
 from redis import Redis
 
 
@@ -210,6 +211,20 @@ class CacheManager:
         )
         self.set(key, batch, self.TTL_PRIORITY)
     
+    def _response_key(self, path: str, args) -> str:
+        # Canonical path + sorted query string, passed as one positional part:
+        # arbitrary client arg names never reach _generate_key as kwargs
+        items = args.items() if isinstance(args, dict) else args
+        return self._generate_key(self.PREFIX_PRIORITY, path + "?" + urlencode(sorted(items)))
+    
+    def get_priority_response(self, path: str, args) -> Optional[dict]:
+        """Get cached priority endpoint response (args: dict or (key, value) pairs)"""
+        return self.get(self._response_key(path, args))
+    
+    def set_priority_response(self, path: str, args, payload: dict, ttl: Optional[int] = None):
+        """Cache priority endpoint response (args: dict or (key, value) pairs)"""
+        self.set(self._response_key(path, args), payload, ttl or self.TTL_PRIORITY)
+    
     def get_entity_details(self, entity_id: str) -> Optional[dict]:
         """Get cached entity details"""
         return self.get(f"{self.PREFIX_ENTITY}{entity_id}")
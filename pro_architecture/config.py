@@ -5,6 +5,8 @@ class Settings:
     PINECONE_API_KEY = os.environ["PINECONE_API_KEY"]
     PINECONE_INDEX   = os.environ.get("PINECONE_INDEX", "mandate-wizard")  # Default to mandate-wizard
     PINECONE_REGION  = os.environ.get("PINECONE_REGION", "us-east-1")
+    PINECONE_POOL_THREADS = int(os.environ.get("PINECONE_POOL_THREADS", "30"))  # concurrent upsert requests
+    PINECONE_GRPC    = os.environ.get("PINECONE_GRPC", "1") == "1"  # gRPC data plane when pinecone-client[grpc] is installed
 
     NEO4J_URI        = os.environ["NEO4J_URI"]
     NEO4J_USER       = os.environ.get("NEO4J_USER", "neo4j")
@@ -16,6 +18,7 @@ class Settings:
     # Embeddings
     EMBEDDER         = os.environ.get("EMBEDDER", "openai")  # openai | local
     EMBEDDING_MODEL  = os.environ.get("EMBEDDING_MODEL", "text-embedding-3-small")
+    EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "128"))  # inputs per embeddings request
 
     # Reranker
     RERANKER         = os.environ.get("RERANKER", "cohere")  # none | cohere | local | onnx
@@ -26,15 +29,31 @@ class Settings:
     TOP_K_VECTOR     = int(os.environ.get("TOP_K_VECTOR", "30"))
     M_Q_EXPANSIONS   = int(os.environ.get("M_Q_EXPANSIONS", "2"))  # multi-query expansion count
     USE_MMR          = os.environ.get("USE_MMR", "1") == "1"
+    RETRIEVE_WORKERS = int(os.environ.get("RETRIEVE_WORKERS", "16"))  # concurrent Pinecone queries per process
+    EARLY_EXIT_SCORE = float(os.environ.get("EARLY_EXIT_SCORE", "0.95"))  # top-1 cosine that skips MQE + rerank (>1 disables)
+    SNIPPET_MAX_CHARS = int(os.environ.get("SNIPPET_MAX_CHARS", "1500"))  # metadata text kept per hit
 
     # Caching
     QUERY_CACHE_TTL  = int(os.environ.get("QUERY_CACHE_TTL", "1800"))
     QUERY_CACHE_MAX  = int(os.environ.get("QUERY_CACHE_MAX", "500"))
+    ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE_ENABLED", "1") == "1"
+    ANSWER_CACHE_TTL = int(os.environ.get("ANSWER_CACHE_TTL", "300"))
+    ANSWER_CACHE_MAX = int(os.environ.get("ANSWER_CACHE_MAX", "2048"))
+    SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE_ENABLED", "1") == "1"
+    SEMANTIC_CACHE_MAX = int(os.environ.get("SEMANTIC_CACHE_MAX", "1024"))
+    SEMANTIC_CACHE_SIM = float(os.environ.get("SEMANTIC_CACHE_SIM", "0.95"))      # min cosine similarity
+    SEMANTIC_CACHE_OVERLAP = float(os.environ.get("SEMANTIC_CACHE_OVERLAP", "0.7"))  # min Jaccard of retrieved IDs
+    RERANK_CACHE_TTL = int(os.environ.get("RERANK_CACHE_TTL", "900"))
+    RERANK_CACHE_MAX = int(os.environ.get("RERANK_CACHE_MAX", "4096"))
     EMBED_CACHE_TTL  = int(os.environ.get("EMBED_CACHE_TTL", "3600"))
-    EMBED_CACHE_MAX  = int(os.environ.get("EMBED_CACHE_MAX", "2000"))
+    EMBED_CACHE_MAX  = int(os.environ.get("EMBED_CACHE_MAX", "8192"))  # fp16 entries, ~3 KB each at 1536 dims
+    EMBED_CACHE_DB   = os.environ.get("EMBED_CACHE_DB", "")  # SQLite path; empty = in-memory only
+    EMBED_CACHE_DB_TTL = int(os.environ.get("EMBED_CACHE_DB_TTL", str(30 * 86400)))
+    INGEST_LEDGER_DB = os.environ.get("INGEST_LEDGER_DB", "")  # SQLite path of card content hashes; empty = ingest every card
 
     # Synthesis
     COMPLETIONS_MODEL = os.environ.get("COMPLETIONS_MODEL", "gpt-4o-mini")
     MAX_TOKENS        = int(os.environ.get("MAX_TOKENS", "750"))
+    PROMPT_CACHE_KEY  = os.environ.get("PROMPT_CACHE_KEY", "mandate-wizard-synthesis")  # routes calls to one prompt cache; empty disables
 
 S = Settings()
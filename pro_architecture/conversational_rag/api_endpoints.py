@@ -5,7 +5,6 @@ Integrates with Mandate Wizard backend
 
 from flask import Blueprint, request, jsonify
 from functools import wraps
-import os
 
 from ..database.postgres_client import get_pg_client
 from ..rag.engine import get_rag_engine
@@ -29,9 +28,10 @@ def get_conversational_rag():
         # LLM client (use existing from app)
         from ..app import llm_client
         
-        # Embedding client (use OpenAI)
-        from openai import OpenAI
-        embedding_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # Embedding client: the process-wide OpenAI client, so embeddings
+        # share its keep-alive pool instead of opening a second one
+        from ..infra.openai_client import get_client
+        embedding_client = get_client()
         
         get_conversational_rag.instance = ConversationalRAG(
             pg_client,
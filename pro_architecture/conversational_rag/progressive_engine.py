@@ -5,12 +5,35 @@ Phase 1: Gemini-optimized version
 
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
+import re
 import time
 
 from .conversation_manager import TurnContext, ResponseStrategy
 from .conversation_store import ConversationStore
 
 
+# Keyword scans compiled once: one C-level pass per text instead of a Python
+# `in` test per keyword. Whole words only, so 'now' doesn't fire on 'know'.
+_RECENCY_RE = re.compile(r'\b(?:current(?:ly)?|recent(?:ly)?|latest|now|today|2025|2024)\b')
+_CONTEXT_PHRASE_RE = re.compile(
+    r'as mentioned|as discussed|building on|in addition to|'
+    r'compared to|unlike|similar to|previously'
+)
+_PROPER_NOUN_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_ENTITY_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b')
+
+# Identical for every turn of every conversation; leads each answer prompt
+_PROMPT_PREFIX = """You are an expert assistant helping users with strategic decision-making.
+
+QUALITY REQUIREMENTS:
+- Be SPECIFIC: Include names, numbers, concrete details
+- Be ACTIONABLE: Provide clear next steps when relevant
+- Be STRATEGIC: Explain WHY, not just WHAT
+- Be CONTEXTUAL: Build on the conversation naturally
+- Be NOVEL: Add NEW value compared to previous answers"""
+
+
 @dataclass
 class ResponseQuality:
     """Quality metrics for a response"""
@@ -194,9 +217,7 @@ class ProgressiveEngine:
             return True
         
         # Trigger if asking for recent/current information
-        query_lower = context.user_query.lower()
-        recency_keywords = ['current', 'recent', 'latest', 'now', 'today', '2025', '2024']
-        if any(keyword in query_lower for keyword in recency_keywords):
+        if _RECENCY_RE.search(context.user_query.lower()):
             return True
         
         # Trigger if deep into conversation and asking for new info
@@ -292,29 +313,24 @@ This is a COMPARATIVE question. Focus specifically on these entities:
 Provide a side-by-side comparison highlighting key differences.
 """
         
-        # Build full prompt
-        prompt = f"""You are an expert assistant helping users with strategic decision-making.
+        # Most stable blocks first: the static prefix never changes, history
+        # changes once per turn, and a novelty retry reuses the same documents,
+        # so everything before its instructions is a prefix the provider can cache
+        prompt = f"""{_PROMPT_PREFIX}
 
 CONVERSATION HISTORY:
 {history}
 
-CURRENT QUESTION: {context.user_query}
-
-RELEVANT INFORMATION:
-{doc_context}
-
 {strategy_instructions}
 
 {comparative_instructions}
 
+RELEVANT INFORMATION:
+{doc_context}
+
 {novelty_instructions}
 
-QUALITY REQUIREMENTS:
-- Be SPECIFIC: Include names, numbers, concrete details
-- Be ACTIONABLE: Provide clear next steps when relevant
-- Be STRATEGIC: Explain WHY, not just WHAT
-- Be CONTEXTUAL: Build on the conversation naturally
-- Be NOVEL: Add NEW value compared to previous answers
+CURRENT QUESTION: {context.user_query}
 
 Answer:"""
         
@@ -400,12 +416,11 @@ Be specific about WHO to contact, WHAT to prepare, WHEN to act, HOW to approach.
         score = 0.5  # Base score
         
         # Check for proper nouns (capitalized words)
-        import re
-        proper_nouns = len(re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', answer))
+        proper_nouns = len(_PROPER_NOUN_RE.findall(answer))
         score += min(proper_nouns * 0.05, 0.3)
         
         # Check for numbers
-        numbers = len(re.findall(r'\b\d+\b', answer))
+        numbers = len(_NUMBER_RE.findall(answer))
         score += min(numbers * 0.05, 0.2)
         
         return min(score, 1.0)
@@ -453,13 +468,8 @@ Be specific about WHO to contact, WHAT to prepare, WHEN to act, HOW to approach.
         score = 0.5  # Base score
         
         # Check if answer references previous conversation
-        context_phrases = [
-            'as mentioned', 'as discussed', 'building on', 'in addition to',
-            'compared to', 'unlike', 'similar to', 'previously'
-        ]
-        
         answer_lower = answer.lower()
-        if any(phrase in answer_lower for phrase in context_phrases):
+        if _CONTEXT_PHRASE_RE.search(answer_lower):
             score += 0.3
         
         # Check if answer mentions entities from conversation
@@ -479,12 +489,9 @@ Be specific about WHO to contact, WHAT to prepare, WHEN to act, HOW to approach.
     
     def _extract_entities(self, answer: str) -> List[str]:
         """Extract entity names from answer"""
-        import re
-        
         # Simple extraction: find capitalized phrases (2-3 words)
         # This is a placeholder - in production, use NER
-        pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b'
-        matches = re.findall(pattern, answer)
+        matches = _ENTITY_RE.findall(answer)
         
         # Filter out common words
         stopwords = {'The', 'This', 'That', 'These', 'Those', 'When', 'Where', 'Why', 'How'}
@@ -119,3 +119,25 @@ def validate_card(data: dict) -> dict:
         return MetricsCard(**data).dict()
     else:
         raise ValueError(f"Unknown card type: {card_type}")
+
+# Fields that carry meaning for retrieval, per card type (IDs, dates and
+# sources are left out of embedding text)
+SEMANTIC_FIELDS = {
+    "executive": ("name", "title", "company", "region", "bio", "mandate", "genres", "formats"),
+    "mandate": ("platform", "department", "executive", "summary", "genres", "formats", "key_requirements"),
+    "company": ("name", "founder", "key_people", "focus_areas", "recent_projects"),
+    "process": ("title", "summary", "steps", "tips"),
+    "news": ("title", "platform", "production_company", "executives", "genre", "deal_type", "key_talent"),
+    "metrics": ("title", "platform", "metric_type", "insights"),
+}
+
+def build_embed_text(card: dict) -> str:
+    """Compact 'field: value | ...' text of a validated card's semantic fields."""
+    parts = []
+    for field in SEMANTIC_FIELDS.get(card.get("type"), ()):
+        value = card.get(field)
+        if isinstance(value, list):
+            value = ", ".join(str(v) for v in value)
+        if value:
+            parts.append(f"{field}: {value}")
+    return " | ".join(parts)
@@ -5,6 +5,7 @@ Migrates all existing data into PostgreSQL as single source of truth
 
 import os
 import sys
+import time
 from datetime import datetime
 import json
 
@@ -64,6 +65,76 @@ def get_entity_slug_from_neo4j_node(node_dict):
     return None
 
 
+def get_entity_type_and_slug_from_pinecone_id(entity_id):
+    """
+    Derive (entity_type, slug) from a Pinecone entity ID.
+    
+    Args:
+        entity_id: ID like 'person_anne_mensah' or a bare slug
+        
+    Returns:
+        tuple: (entity_type, slug); bare IDs are treated as people
+    """
+    for prefix, entity_type in (('person_', 'person'), ('company_', 'company'), ('project_', 'project')):
+        if entity_id.startswith(prefix):
+            return entity_type, entity_id.replace(prefix, '')
+    return 'person', entity_id
+
+
+class Progress:
+    """
+    Running item count for long loops, printed at most once per interval.
+    
+    Replaces a print per item: on large migrations the per-line writes (and
+    pipe flushes when run under a process manager) add up and bury errors.
+    """
+    
+    def __init__(self, label, interval=5.0):
+        self.label = label
+        self.count = 0
+        self.interval = interval
+        self._next_report = time.monotonic() + interval
+    
+    def tick(self):
+        self.count += 1
+        now = time.monotonic()
+        if now >= self._next_report:
+            print(f"  ... {self.count} {self.label} so far", flush=True)
+            self._next_report = now + self.interval
+
+
+def stream_with_existing(pg_client, result, key, page_size=1000):
+    """
+    Stream Neo4j nodes page by page instead of materializing the whole result.
+    
+    Args:
+        pg_client: PostgresClient instance
+        result: Neo4j result to consume lazily
+        key: Record key holding the node
+        page_size: Nodes per page (one Postgres slug lookup per page)
+        
+    Yields:
+        tuple: (node_dict, existing_by_slug) where existing_by_slug maps the
+        page's slugs to rows already in PostgreSQL
+    """
+    page = []
+    for record in result:
+        page.append(dict(record[key]))
+        if len(page) >= page_size:
+            yield from _with_existing(pg_client, page)
+            page = []
+    if page:
+        yield from _with_existing(pg_client, page)
+
+
+def _with_existing(pg_client, page):
+    existing_by_slug = pg_client.get_entities_by_slugs(
+        [get_entity_slug_from_neo4j_node(node) for node in page]
+    )
+    for node in page:
+        yield node, existing_by_slug
+
+
 def migrate_pinecone_to_postgres(pg_client):
     """
     Migrate data from Pinecone to PostgreSQL.
@@ -108,30 +179,31 @@ def migrate_pinecone_to_postgres(pg_client):
                 'cards_created': 0
             }
         
-        # Fetch all vector IDs first
-        print("\n🔍 Fetching vector IDs...")
-        all_ids = []
-        
-        # Use list operation to get all IDs
-        for ids_batch in index.list():
-            all_ids.extend(ids_batch)
-        
-        print(f"✅ Found {len(all_ids)} vector IDs")
-        
-        # Fetch vectors in batches
+        # Stream vector IDs page by page; each page is fetched and migrated
+        # before the next is listed, so the full ID list is never held
         entities_created = 0
         cards_created = 0
         errors = []
         
         batch_size = 100
-        for i in range(0, len(all_ids), batch_size):
-            batch_ids = all_ids[i:i+batch_size]
-            print(f"\n📦 Processing batch {i//batch_size + 1}/{(len(all_ids)-1)//batch_size + 1} ({len(batch_ids)} vectors)...")
+        seen = 0
+        for batch_num, batch_ids in enumerate(index.list(limit=batch_size), 1):
+            seen += len(batch_ids)
+            print(f"\n📦 Processing batch {batch_num} ({len(batch_ids)} vectors, {seen}/{total_vectors})...")
             
             # Fetch vectors with metadata
             fetch_response = index.fetch(ids=batch_ids)
+            vectors = fetch_response.get('vectors', {})
+            
+            # One lookup for every slug in the batch instead of one per vector
+            existing_slugs = set(pg_client.get_entities_by_slugs([
+                get_entity_type_and_slug_from_pinecone_id(
+                    (vector_data.get('metadata') or {}).get('id', vector_id)
+                )[1]
+                for vector_id, vector_data in vectors.items()
+            ]))
             
-            for vector_id, vector_data in fetch_response.get('vectors', {}).items():
+            for vector_id, vector_data in vectors.items():
                 try:
                     metadata = vector_data.get('metadata', {})
                     
@@ -143,22 +215,10 @@ def migrate_pinecone_to_postgres(pg_client):
                     name = metadata.get('name', 'Unknown')
                     
                     # Determine entity type from ID
-                    if entity_id.startswith('person_'):
-                        entity_type = 'person'
-                        slug = entity_id.replace('person_', '')
-                    elif entity_id.startswith('company_'):
-                        entity_type = 'company'
-                        slug = entity_id.replace('company_', '')
-                    elif entity_id.startswith('project_'):
-                        entity_type = 'project'
-                        slug = entity_id.replace('project_', '')
-                    else:
-                        entity_type = 'person'
-                        slug = entity_id
+                    entity_type, slug = get_entity_type_and_slug_from_pinecone_id(entity_id)
                     
                     # Check if entity already exists
-                    existing = pg_client.get_entity(slug=slug)
-                    if existing:
+                    if slug in existing_slugs:
                         continue
                     
                     # Build attributes
@@ -176,43 +236,37 @@ def migrate_pinecone_to_postgres(pg_client):
                     # Remove None values
                     attributes = {k: v for k, v in attributes.items() if v is not None}
                     
-                    # Create entity
-                    pg_entity_id = pg_client.create_entity(
+                    # Bio and mandate cards, if present
+                    cards = []
+                    bio = metadata.get('bio')
+                    if bio and len(bio.strip()) > 0:
+                        cards.append({
+                            'card_type': 'bio',
+                            'title': f"Bio - {name}",
+                            'content': bio
+                        })
+                    mandate = metadata.get('mandate')
+                    if mandate and len(mandate.strip()) > 0:
+                        cards.append({
+                            'card_type': 'mandate',
+                            'title': f"Mandate - {name}",
+                            'content': mandate
+                        })
+                    
+                    # Create entity and its cards in one round-trip
+                    pg_client.create_entity_with_cards(
                         entity_type=entity_type,
                         name=name,
                         slug=slug,
                         attributes=attributes,
+                        cards=cards,
                         confidence_score=0.8,
                         source='pinecone_migration',
                         created_by='migration_script'
                     )
+                    existing_slugs.add(slug)
                     entities_created += 1
-                    
-                    # Create bio card if exists
-                    bio = metadata.get('bio')
-                    if bio and len(bio.strip()) > 0:
-                        pg_client.create_card(
-                            entity_id=pg_entity_id,
-                            card_type='bio',
-                            title=f"Bio - {name}",
-                            content=bio,
-                            confidence_score=0.8,
-                            source='pinecone_migration'
-                        )
-                        cards_created += 1
-                    
-                    # Create mandate card if exists
-                    mandate = metadata.get('mandate')
-                    if mandate and len(mandate.strip()) > 0:
-                        pg_client.create_card(
-                            entity_id=pg_entity_id,
-                            card_type='mandate',
-                            title=f"Mandate - {name}",
-                            content=mandate,
-                            confidence_score=0.8,
-                            source='pinecone_migration'
-                        )
-                        cards_created += 1
+                    cards_created += len(cards)
                     
                 except Exception as e:
                     errors.append(f"Error migrating {vector_id}: {str(e)}")
@@ -295,12 +349,11 @@ def migrate_neo4j_to_postgres(pg_client):
             # Migrate Person nodes
             print("\n👤 Migrating Person nodes...")
             persons_result = session.run("MATCH (p:Person) RETURN p")
-            persons = list(persons_result)
-            print(f"  Found {len(persons)} Person nodes")
+            progress = Progress('Person nodes')
             
-            for record in persons:
+            for person_dict, existing_by_slug in stream_with_existing(pg_client, persons_result, 'p'):
+                progress.tick()
                 try:
-                    person_dict = dict(record['p'])
                     name = person_dict.get('name')
                     
                     if not name:
@@ -311,7 +364,7 @@ def migrate_neo4j_to_postgres(pg_client):
                         continue
                     
                     # Check if entity already exists
-                    existing = pg_client.get_entity(slug=slug)
+                    existing = existing_by_slug.get(slug)
                     
                     if existing:
                         # Update with Neo4j data
@@ -344,7 +397,7 @@ def migrate_neo4j_to_postgres(pg_client):
                         )
                         entities_created += 1
                         node_to_entity_map[slug] = pg_entity_id
-                        print(f"  ✅ Created: {name}")
+                        existing_by_slug[slug] = {'id': pg_entity_id}
                     
                 except Exception as e:
                     error_msg = f"Error migrating Person {person_dict.get('name', 'unknown')}: {str(e)}"
@@ -352,15 +405,16 @@ def migrate_neo4j_to_postgres(pg_client):
                     errors.append(error_msg)
                     # Continue to next entity
             
+            print(f"  Processed {progress.count} Person nodes")
+            
             # Migrate Company nodes
             print("\n🏢 Migrating Company nodes...")
             companies_result = session.run("MATCH (c:Company) RETURN c")
-            companies = list(companies_result)
-            print(f"  Found {len(companies)} Company nodes")
+            progress = Progress('Company nodes')
             
-            for record in companies:
+            for company_dict, existing_by_slug in stream_with_existing(pg_client, companies_result, 'c'):
+                progress.tick()
                 try:
-                    company_dict = dict(record['c'])
                     name = company_dict.get('name')
                     
                     if not name:
@@ -370,7 +424,7 @@ def migrate_neo4j_to_postgres(pg_client):
                     if not slug:
                         continue
                     
-                    existing = pg_client.get_entity(slug=slug)
+                    existing = existing_by_slug.get(slug)
                     
                     if existing:
                         entities_updated += 1
@@ -393,20 +447,21 @@ def migrate_neo4j_to_postgres(pg_client):
                         )
                         entities_created += 1
                         node_to_entity_map[slug] = pg_entity_id
-                        print(f"  ✅ Created: {name}")
+                        existing_by_slug[slug] = {'id': pg_entity_id}
                     
                 except Exception as e:
                     errors.append(f"Error migrating Company {company_dict.get('name', 'unknown')}: {str(e)}")
             
+            print(f"  Processed {progress.count} Company nodes")
+            
             # Migrate ProductionCompany nodes
             print("\n🎬 Migrating ProductionCompany nodes...")
             prodcos_result = session.run("MATCH (pc:ProductionCompany) RETURN pc")
-            prodcos = list(prodcos_result)
-            print(f"  Found {len(prodcos)} ProductionCompany nodes")
+            progress = Progress('ProductionCompany nodes')
             
-            for record in prodcos:
+            for prodco_dict, existing_by_slug in stream_with_existing(pg_client, prodcos_result, 'pc'):
+                progress.tick()
                 try:
-                    prodco_dict = dict(record['pc'])
                     name = prodco_dict.get('name')
                     
                     if not name:
@@ -416,7 +471,7 @@ def migrate_neo4j_to_postgres(pg_client):
                     if not slug:
                         continue
                     
-                    existing = pg_client.get_entity(slug=slug)
+                    existing = existing_by_slug.get(slug)
                     
                     if existing:
                         entities_updated += 1
@@ -439,20 +494,21 @@ def migrate_neo4j_to_postgres(pg_client):
                         )
                         entities_created += 1
                         node_to_entity_map[slug] = pg_entity_id
-                        print(f"  ✅ Created: {name}")
+                        existing_by_slug[slug] = {'id': pg_entity_id}
                     
                 except Exception as e:
                     errors.append(f"Error migrating ProductionCompany: {str(e)}")
             
+            print(f"  Processed {progress.count} ProductionCompany nodes")
+            
             # Migrate Platform nodes
             print("\n📺 Migrating Platform nodes...")
             platforms_result = session.run("MATCH (p:Platform) RETURN p")
-            platforms = list(platforms_result)
-            print(f"  Found {len(platforms)} Platform nodes")
+            progress = Progress('Platform nodes')
             
-            for record in platforms:
+            for platform_dict, existing_by_slug in stream_with_existing(pg_client, platforms_result, 'p'):
+                progress.tick()
                 try:
-                    platform_dict = dict(record['p'])
                     name = platform_dict.get('name')
                     
                     if not name:
@@ -462,7 +518,7 @@ def migrate_neo4j_to_postgres(pg_client):
                     if not slug:
                         continue
                     
-                    existing = pg_client.get_entity(slug=slug)
+                    existing = existing_by_slug.get(slug)
                     
                     if existing:
                         entities_updated += 1
@@ -485,11 +541,13 @@ def migrate_neo4j_to_postgres(pg_client):
                         )
                         entities_created += 1
                         node_to_entity_map[slug] = pg_entity_id
-                        print(f"  ✅ Created: {name}")
+                        existing_by_slug[slug] = {'id': pg_entity_id}
                     
                 except Exception as e:
                     errors.append(f"Error migrating Platform: {str(e)}")
             
+            print(f"  Processed {progress.count} Platform nodes")
+            
             # Migrate relationships
             print("\n🔗 Migrating relationships...")
             
@@ -505,6 +563,8 @@ def migrate_neo4j_to_postgres(pg_client):
                 rels = list(rels_result)
                 print(f"    Found {len(rels)} {rel_type} relationships")
                 
+                # Collected here, written with one bulk upsert per page
+                pending = []
                 for record in rels:
                     try:
                         from_dict = dict(record['from'])
@@ -523,19 +583,21 @@ def migrate_neo4j_to_postgres(pg_client):
                         if not from_entity_id or not to_entity_id:
                             continue
                         
-                        # Create relation
-                        pg_client.create_relation(
-                            from_entity_id=from_entity_id,
-                            to_entity_id=to_entity_id,
-                            relation_type=rel_type.lower(),
-                            attributes=rel_dict,
-                            confidence_score=0.8,
-                            source='neo4j_migration'
-                        )
-                        relations_created += 1
+                        pending.append({
+                            'from_entity_id': from_entity_id,
+                            'to_entity_id': to_entity_id,
+                            'relation_type': rel_type.lower(),
+                            'attributes': rel_dict,
+                            'confidence_score': 0.8
+                        })
                         
                     except Exception as e:
                         errors.append(f"Error migrating {rel_type} relationship: {str(e)}")
+                
+                try:
+                    relations_created += pg_client.create_relations(pending)
+                except Exception as e:
+                    errors.append(f"Error migrating {rel_type} relationships: {str(e)}")
             
         driver.close()
         
@@ -590,11 +652,13 @@ def run_full_migration():
     # Initialize PostgreSQL client
     pg_client = PostgresClient()
     
-    # Migrate from Pinecone
-    pinecone_result = migrate_pinecone_to_postgres(pg_client)
-    
-    # Migrate from Neo4j
-    neo4j_result = migrate_neo4j_to_postgres(pg_client)
+    # One connection for the whole run, without a WAL flush wait per entity
+    with pg_client.bulk_load():
+        # Migrate from Pinecone
+        pinecone_result = migrate_pinecone_to_postgres(pg_client)
+        
+        # Migrate from Neo4j
+        neo4j_result = migrate_neo4j_to_postgres(pg_client)
     
     print("\n" + "="*60)
     print("✅ MIGRATION COMPLETE")
@@ -4,8 +4,18 @@ Provides a simple HTTP endpoint to run database migrations
 """
 
 import os
-import psycopg2
-from flask import jsonify
+import orjson
+import psycopg
+from psycopg import sql
+from flask import Response
+
+def json_response(payload: dict, status: int = 200) -> Response:
+    """Serialize payload with orjson and wrap it in a JSON Response."""
+    return Response(
+        orjson.dumps(payload, default=str),
+        status=status,
+        mimetype='application/json'
+    )
 
 def run_migration(database_url: str, migration_file: str):
     """
@@ -24,7 +34,7 @@ def run_migration(database_url: str, migration_file: str):
             sql = f.read()
         
         # Connect to database
-        conn = psycopg2.connect(database_url)
+        conn = psycopg.connect(database_url)
         cur = conn.cursor()
         
         # Execute migration
@@ -55,6 +65,26 @@ def run_migration(database_url: str, migration_file: str):
             'migration_file': migration_file
         }
 
+def count_rows(conn, tables: list) -> dict:
+    """
+    Exact row count per table.
+    
+    All COUNT(*) statements are sent in one psycopg pipeline, so the
+    round-trip cost is paid once rather than per table.
+    """
+    cursors = []
+    with conn.pipeline():
+        for table in tables:
+            cur = conn.cursor()
+            cur.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(table)))
+            cursors.append((table, cur))
+    
+    counts = {}
+    for table, cur in cursors:
+        counts[table] = cur.fetchone()[0]
+        cur.close()
+    return counts
+
 def create_data_migration_endpoint(app):
     """
     Add data migration endpoint to Flask app.
@@ -78,12 +108,12 @@ def create_data_migration_endpoint(app):
         try:
             result = run_full_migration()
             status_code = 200 if result.get('success') else 500
-            return jsonify(result), status_code
+            return json_response(result, status_code)
         except Exception as e:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'message': f'Migration failed: {str(e)}'
-            }), 500
+            }, 500)
 
 def create_migration_endpoint(app):
     """
@@ -106,10 +136,10 @@ def create_migration_endpoint(app):
         database_url = os.getenv('DATABASE_URL')
         
         if not database_url:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'message': 'DATABASE_URL environment variable not set'
-            }), 500
+            }, 500)
         
         # Path to migrations directory
         migrations_dir = os.path.join(
@@ -121,7 +151,8 @@ def create_migration_endpoint(app):
         migration_files = [
             '001_initial_schema.sql',
             '002_add_entity_types.sql',
-            '003_remove_entity_type_constraint.sql'
+            '003_remove_entity_type_constraint.sql',
+            '004_priority_indexes.sql'
         ]
         
         results = []
@@ -143,7 +174,7 @@ def create_migration_endpoint(app):
         }
         
         status_code = 200 if result['success'] else 500
-        return jsonify(result), status_code
+        return json_response(result, status_code)
     
     @app.route('/api/admin/db-status', methods=['GET'])
     def database_status():
@@ -158,13 +189,13 @@ def create_migration_endpoint(app):
         database_url = os.getenv('DATABASE_URL')
         
         if not database_url:
-            return jsonify({
+            return json_response({
                 'connected': False,
                 'message': 'DATABASE_URL not configured'
-            }), 500
+            }, 500)
         
         try:
-            conn = psycopg2.connect(database_url)
+            conn = psycopg.connect(database_url)
             cur = conn.cursor()
             
             # Get table list
@@ -177,23 +208,20 @@ def create_migration_endpoint(app):
             tables = [row[0] for row in cur.fetchall()]
             
             # Get row counts
-            counts = {}
-            for table in tables:
-                cur.execute(f"SELECT COUNT(*) FROM {table}")
-                counts[table] = cur.fetchone()[0]
+            counts = count_rows(conn, tables)
             
             cur.close()
             conn.close()
             
-            return jsonify({
+            return json_response({
                 'connected': True,
                 'tables': tables,
                 'row_counts': counts,
                 'message': f'Database connected. {len(tables)} tables found.'
-            }), 200
+            }, 200)
             
         except Exception as e:
-            return jsonify({
+            return json_response({
                 'connected': False,
                 'message': f'Database connection failed: {str(e)}'
-            }), 500
+            }, 500)
@@ -0,0 +1,9 @@
+-- Migration 004: Indexes for SQL-side priority scoring
+-- /api/priority/critical only reads entities with demand; /batch and /schedule
+-- order by demand then staleness as their tie-break.
+
+CREATE INDEX IF NOT EXISTS idx_entities_demand_positive
+ON entities(demand_score DESC) WHERE demand_score > 0;
+
+CREATE INDEX IF NOT EXISTS idx_entities_demand_updated
+ON entities(demand_score DESC, updated_at ASC);
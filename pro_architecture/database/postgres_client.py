@@ -3,58 +3,228 @@ PostgreSQL Client for Mandate Wizard
 System of Record (SoR) for all entity data
 """
 
+import copy
 import os
-import psycopg2
-import psycopg2.extras
+import time
+import threading
+from contextlib import contextmanager
+import psycopg
+import psycopg.types.json
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 import json
+import orjson
+from collections import Counter, OrderedDict
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+# JSON/JSONB columns are decoded once by the driver, with orjson
+psycopg.types.json.set_json_loads(orjson.loads)
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(database_url: str) -> ConnectionPool:
+    """
+    Get the process-wide connection pool for a database URL.
+    
+    Sized by PG_POOL_MIN / PG_POOL_MAX (default: one per Gunicorn thread
+    plus headroom for background flushes).
+    """
+    pool = _pools.get(database_url)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(database_url)
+            if pool is None:
+                # Statements run more than prepare_threshold times are prepared
+                # server-side and reused; set PG_PREPARE_THRESHOLD=none behind
+                # PgBouncer in transaction mode.
+                threshold = os.getenv('PG_PREPARE_THRESHOLD', '3')
+                max_size = int(os.getenv(
+                    'PG_POOL_MAX', str(int(os.getenv('WEB_THREADS', '8')) + 2)
+                ))
+                pool = ConnectionPool(
+                    database_url,
+                    min_size=min(int(os.getenv('PG_POOL_MIN', '1')), max_size),
+                    max_size=max_size,
+                    kwargs={
+                        'prepare_threshold': None if threshold.lower() == 'none' else int(threshold)
+                    },
+                    check=ConnectionPool.check_connection,
+                    open=True
+                )
+                _pools[database_url] = pool
+    return pool
+
+
+class EntityCache:
+    """
+    Small in-process TTL + LRU cache for entity rows.
+    
+    Rows are stored by entity id with a slug -> id index, so a lookup by
+    either key hits the same entry and invalidation removes both.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._slugs: Dict[str, str] = {}
+        self._lock = threading.RLock()
+    
+    def get(self, entity_id: str = None, slug: str = None) -> Optional[Dict]:
+        """Return a deep copy of the cached row, or None on miss/expiry."""
+        with self._lock:
+            key = str(entity_id) if entity_id else self._slugs.get(slug)
+            hit = self._entries.get(key) if key else None
+            if hit is None:
+                return None
+            expires_at, entity = hit
+            if time.monotonic() > expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            # Deep: callers may edit nested JSONB (attributes) in place
+            return copy.deepcopy(entity)
+    
+    def put(self, entity: Dict):
+        """Cache a deep copy of an entity row, detached from the caller's dicts."""
+        key = str(entity['id'])
+        entity = copy.deepcopy(entity)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, entity)
+            if entity.get('slug'):
+                self._slugs[entity['slug']] = key
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate(self, entity_id: str = None, slug: str = None):
+        """Drop the cached row for an entity id or slug."""
+        with self._lock:
+            key = str(entity_id) if entity_id else self._slugs.get(slug)
+            if key:
+                self._remove(key)
+            if slug:
+                self._slugs.pop(slug, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._slugs.clear()
+    
+    def _remove(self, key: str):
+        hit = self._entries.pop(key, None)
+        if hit:
+            slug = hit[1].get('slug')
+            if slug and self._slugs.get(slug) == key:
+                del self._slugs[slug]
+
+
 class PostgresClient:
     """Client for PostgreSQL system of record."""
     
-    def __init__(self, database_url: str = None):
+    def __init__(
+        self,
+        database_url: str = None,
+        entity_cache_size: int = None,
+        entity_cache_ttl: float = None,
+        demand_flush_interval: float = None
+    ):
         """
         Initialize PostgreSQL client.
         
         Args:
             database_url: PostgreSQL connection string (defaults to DATABASE_URL env var)
+            entity_cache_size: Max entities kept by get_entity (defaults to ENTITY_CACHE_MAX or 10000)
+            entity_cache_ttl: Seconds a cached entity stays valid (defaults to ENTITY_CACHE_TTL or 60)
+            demand_flush_interval: Seconds to coalesce demand increments before writing
+                (defaults to DEMAND_FLUSH_INTERVAL or 1.0; 0 writes immediately)
         """
         self.database_url = database_url or os.getenv('DATABASE_URL')
         if not self.database_url:
             raise ValueError("DATABASE_URL environment variable not set")
         
-        self.conn = None
+        self.entity_cache = EntityCache(
+            maxsize=entity_cache_size or int(os.getenv('ENTITY_CACHE_MAX', '10000')),
+            ttl=entity_cache_ttl if entity_cache_ttl is not None else float(os.getenv('ENTITY_CACHE_TTL', '60'))
+        )
+        
+        # Pending demand increments keyed by ('id' | 'slug', value)
+        self.demand_flush_interval = (
+            demand_flush_interval if demand_flush_interval is not None
+            else float(os.getenv('DEMAND_FLUSH_INTERVAL', '1.0'))
+        )
+        self._pending_demand: Counter = Counter()
+        self._demand_lock = threading.Lock()
+        self._demand_timer = None
+        self._demand_retry_delay = 0.0  # backoff after failed background flushes
+        
+        # Connection pinned to the current thread by bulk_load()
+        self._bulk = threading.local()
+        
+        self.pool = None
         self.connect()
     
     def connect(self):
-        """Establish database connection."""
+        """Attach to the shared connection pool."""
         try:
-            self.conn = psycopg2.connect(
-                self.database_url,
-                cursor_factory=psycopg2.extras.RealDictCursor
-            )
+            self.pool = get_pool(self.database_url)
             print("✅ PostgreSQL connected")
         except Exception as e:
             print(f"❌ PostgreSQL connection failed: {e}")
             raise
     
-    def execute(self, query: str, params: tuple = None, fetch=True) -> List[Dict]:
-        """Execute query and return results."""
-        try:
-            with self.conn.cursor() as cur:
-                cur.execute(query, params)
-                if fetch and cur.description:
-                    result = [dict(row) for row in cur.fetchall()]
-                    self.conn.commit()
-                    return result
-                self.conn.commit()
-                return []
-        except Exception as e:
-            # Rollback transaction on error
-            self.conn.rollback()
-            # Re-raise the exception
-            raise
+    def execute(self, query: str, params: tuple = None, fetch=True, dict_rows=False) -> List:
+        """
+        Execute query and return results.
+        
+        A pooled connection is borrowed for this call only: the transaction
+        commits (or rolls back on error) and the connection goes back to the
+        pool before returning. Rows are plain tuples by default; pass
+        dict_rows=True to get column-name keyed dicts.
+        """
+        conn = getattr(self._bulk, 'conn', None)
+        if conn is not None:
+            return self._execute_on(conn, query, params, fetch, dict_rows)
+        with self.pool.connection() as conn:
+            return self._execute_on(conn, query, params, fetch, dict_rows)
+    
+    @staticmethod
+    def _execute_on(conn, query, params, fetch, dict_rows) -> List:
+        cur = conn.cursor(row_factory=dict_row) if dict_rows else conn.cursor()
+        with cur:
+            cur.execute(query, params)
+            if fetch and cur.description:
+                return cur.fetchall()
+            return []
+    
+    @contextmanager
+    def bulk_load(self):
+        """
+        Pin one pooled connection to this thread for a bulk write loop.
+        
+        Inside the block every execute() on this thread reuses the same
+        connection in autocommit mode with synchronous_commit off, so each
+        statement still commits on its own (a failed row does not abort the
+        rest) but none waits for the WAL flush. A crash can lose the last few
+        commits, which a re-run of an idempotent migration recovers.
+        """
+        if getattr(self._bulk, 'conn', None) is not None:
+            yield
+            return
+        with self.pool.connection() as conn:
+            conn.autocommit = True
+            conn.execute("SET synchronous_commit = off")
+            self._bulk.conn = conn
+            try:
+                yield
+            finally:
+                self._bulk.conn = None
+                try:
+                    conn.execute("RESET synchronous_commit")
+                finally:
+                    conn.autocommit = False
     
     # Entity operations
     
@@ -82,10 +252,116 @@ class PostgresClient:
             (entity_type, name, slug, json.dumps(attributes),
              confidence_score, source, created_by)
         )
-        return str(result[0]['id'])
+        return str(result[0][0])
+    
+    def create_entity_with_cards(
+        self,
+        entity_type: str,
+        name: str,
+        slug: str,
+        attributes: Dict,
+        cards: List[Dict],
+        confidence_score: float = 0.5,
+        source: str = "manual",
+        created_by: str = None
+    ) -> str:
+        """
+        Create an entity and its cards in a single statement. Returns entity UUID.
+        
+        Each card dict needs card_type, title and content; confidence_score and
+        source default to the entity's values.
+        """
+        query = """
+            WITH ent AS (
+                INSERT INTO entities (
+                    entity_type, name, slug, attributes,
+                    confidence_score, source, created_by
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            ), new_cards AS (
+                INSERT INTO cards (
+                    entity_id, card_type, title, content,
+                    confidence_score, source
+                )
+                SELECT ent.id, c.card_type, c.title, c.content,
+                       c.confidence_score, c.source
+                FROM ent, UNNEST(
+                    %s::text[], %s::text[], %s::text[], %s::float8[], %s::text[]
+                ) AS c(card_type, title, content, confidence_score, source)
+                RETURNING id
+            )
+            SELECT id FROM ent
+        """
+        result = self.execute(
+            query,
+            (entity_type, name, slug, json.dumps(attributes),
+             confidence_score, source, created_by,
+             [c['card_type'] for c in cards],
+             [c['title'] for c in cards],
+             [c['content'] for c in cards],
+             [c.get('confidence_score', confidence_score) for c in cards],
+             [c.get('source', source) for c in cards])
+        )
+        return str(result[0][0])
+    
+    def create_entity_with_relations(
+        self,
+        entity_type: str,
+        name: str,
+        slug: str,
+        attributes: Dict,
+        relations: List[Dict],
+        confidence_score: float = 0.5,
+        source: str = "manual",
+        created_by: str = None
+    ) -> str:
+        """
+        Create an entity and its outgoing relations in a single statement.
+        Returns entity UUID.
+        
+        Each relation dict needs to_entity_id and relation_type; attributes and
+        confidence_score are optional.
+        """
+        query = """
+            WITH ent AS (
+                INSERT INTO entities (
+                    entity_type, name, slug, attributes,
+                    confidence_score, source, created_by
+                )
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            ), new_relations AS (
+                INSERT INTO relations (
+                    from_entity_id, to_entity_id, relation_type,
+                    attributes, confidence_score
+                )
+                SELECT ent.id, r.to_entity_id::uuid, r.relation_type,
+                       r.attributes::jsonb, r.confidence_score
+                FROM ent, UNNEST(
+                    %s::text[], %s::text[], %s::text[], %s::float8[]
+                ) AS r(to_entity_id, relation_type, attributes, confidence_score)
+                RETURNING id
+            )
+            SELECT id FROM ent
+        """
+        result = self.execute(
+            query,
+            (entity_type, name, slug, json.dumps(attributes),
+             confidence_score, source, created_by,
+             [str(r['to_entity_id']) for r in relations],
+             [r['relation_type'] for r in relations],
+             [json.dumps(r.get('attributes') or {}) for r in relations],
+             [r.get('confidence_score', 0.5) for r in relations])
+        )
+        return str(result[0][0])
     
     def get_entity(self, entity_id: str = None, slug: str = None) -> Optional[Dict]:
-        """Get entity by ID or slug."""
+        """Get entity by ID or slug (served from the in-process cache when fresh)."""
+        cached = self.entity_cache.get(entity_id=entity_id, slug=slug)
+        if cached is not None:
+            return cached
+        
         if entity_id:
             query = "SELECT * FROM entities WHERE id = %s"
             params = (entity_id,)
@@ -95,15 +371,25 @@ class PostgresClient:
         else:
             return None
         
-        results = self.execute(query, params)
+        results = self.execute(query, params, dict_rows=True)
         if results:
             entity = results[0]
-            # Parse JSONB attributes
-            if isinstance(entity.get('attributes'), str):
-                entity['attributes'] = json.loads(entity['attributes'])
+            self.entity_cache.put(entity)
             return entity
         return None
     
+    def get_entities_by_slugs(self, slugs: List[str]) -> Dict[str, Dict]:
+        """Get many entities in one query, keyed by slug (missing slugs are absent)."""
+        slugs = list(dict.fromkeys(slug for slug in slugs if slug))
+        if not slugs:
+            return {}
+        rows = self.execute(
+            "SELECT * FROM entities WHERE slug = ANY(%s)", (slugs,), dict_rows=True
+        )
+        for row in rows:
+            self.entity_cache.put(row)
+        return {row['slug']: row for row in rows}
+    
     def update_entity(
         self,
         entity_id: str,
@@ -135,31 +421,96 @@ class PostgresClient:
         params.append(entity_id)
         query = f"UPDATE entities SET {', '.join(updates)} WHERE id = %s"
         self.execute(query, tuple(params), fetch=False)
+        self.entity_cache.invalidate(entity_id=entity_id)
     
     def increment_demand_score(self, entity_id: str = None, slug: str = None):
-        """Increment demand score for entity."""
+        """
+        Increment demand score for entity.
+        
+        Increments are coalesced in memory and written by flush_demand_scores()
+        at most demand_flush_interval seconds later, in one UPDATE per key type.
+        """
         if entity_id:
-            query = """
-                UPDATE entities
-                SET demand_score = demand_score + 1,
-                    query_count = query_count + 1,
-                    last_queried_at = NOW()
-                WHERE id = %s
-            """
-            params = (entity_id,)
+            key = ('id', str(entity_id))
         elif slug:
-            query = """
-                UPDATE entities
-                SET demand_score = demand_score + 1,
-                    query_count = query_count + 1,
-                    last_queried_at = NOW()
-                WHERE slug = %s
-            """
-            params = (slug,)
+            key = ('slug', slug)
+        else:
+            return
+        
+        if self.demand_flush_interval <= 0:
+            with self._demand_lock:
+                self._pending_demand[key] += 1
+            self.flush_demand_scores()
+            return
+        
+        with self._demand_lock:
+            self._pending_demand[key] += 1
+            if self._demand_timer is None:
+                self._start_demand_timer(self.demand_flush_interval)
+    
+    def _start_demand_timer(self, delay: float):
+        """Schedule a background flush; caller holds _demand_lock."""
+        self._demand_timer = threading.Timer(delay, self._flush_demand_in_background)
+        self._demand_timer.daemon = True
+        self._demand_timer.start()
+    
+    def _flush_demand_in_background(self):
+        try:
+            self.flush_demand_scores()
+        except Exception as e:
+            # The increments were re-queued; retry on our own rather than
+            # waiting for the next increment, backing off up to a minute
+            with self._demand_lock:
+                self._demand_retry_delay = min(
+                    max(self._demand_retry_delay * 2, self.demand_flush_interval, 1.0), 60.0
+                )
+                if self._demand_timer is None:
+                    self._start_demand_timer(self._demand_retry_delay)
+            print(f"⚠️ Demand score flush failed, retrying in {self._demand_retry_delay:.0f}s: {e}")
         else:
+            self._demand_retry_delay = 0.0
+    
+    def flush_demand_scores(self):
+        """Write all pending demand increments to the database."""
+        with self._demand_lock:
+            pending, self._pending_demand = self._pending_demand, Counter()
+            self._demand_timer = None
+        if not pending:
             return
         
-        self.execute(query, params, fetch=False)
+        by_id = [(value, n) for (kind, value), n in pending.items() if kind == 'id']
+        by_slug = [(value, n) for (kind, value), n in pending.items() if kind == 'slug']
+        
+        try:
+            with self.pool.connection() as conn, conn.cursor() as cur:
+                if by_id:
+                    cur.execute("""
+                        UPDATE entities
+                        SET demand_score = demand_score + c.n,
+                            query_count = query_count + c.n,
+                            last_queried_at = NOW()
+                        FROM UNNEST(%s::uuid[], %s::int[]) AS c(id, n)
+                        WHERE entities.id = c.id
+                    """, ([v for v, _ in by_id], [n for _, n in by_id]))
+                if by_slug:
+                    cur.execute("""
+                        UPDATE entities
+                        SET demand_score = demand_score + c.n,
+                            query_count = query_count + c.n,
+                            last_queried_at = NOW()
+                        FROM UNNEST(%s::text[], %s::int[]) AS c(slug, n)
+                        WHERE entities.slug = c.slug
+                    """, ([v for v, _ in by_slug], [n for _, n in by_slug]))
+        except Exception:
+            # Keep the increments for the next flush
+            with self._demand_lock:
+                self._pending_demand.update(pending)
+            raise
+        
+        for value, _ in by_id:
+            self.entity_cache.invalidate(entity_id=value)
+        for value, _ in by_slug:
+            self.entity_cache.invalidate(slug=value)
     
     # Card operations
     
@@ -185,7 +536,7 @@ class PostgresClient:
             query,
             (entity_id, card_type, title, content, confidence_score, source)
         )
-        return str(result[0]['id'])
+        return str(result[0][0])
     
     def get_cards_for_entity(
         self,
@@ -201,7 +552,7 @@ class PostgresClient:
             params.append(card_type)
         
         query += " ORDER BY created_at DESC"
-        return self.execute(query, tuple(params))
+        return self.execute(query, tuple(params), dict_rows=True)
     
     # Relation operations
     
@@ -232,7 +583,50 @@ class PostgresClient:
             (from_entity_id, to_entity_id, relation_type,
              json.dumps(attributes or {}), confidence_score)
         )
-        return str(result[0]['id'])
+        return str(result[0][0])
+    
+    def create_relations(self, relations: List[Dict], page_size: int = 1000) -> int:
+        """
+        Upsert many relations, one INSERT ... SELECT FROM UNNEST per page.
+        
+        Each dict needs from_entity_id, to_entity_id and relation_type;
+        attributes and confidence_score are optional. Self-relations are
+        skipped, and for duplicate keys the last one wins (as with repeated
+        create_relation calls). Returns the number of relations written.
+        """
+        latest = {}
+        for r in relations:
+            if str(r['from_entity_id']) == str(r['to_entity_id']):
+                continue
+            latest[(str(r['from_entity_id']), str(r['to_entity_id']), r['relation_type'])] = r
+        rows = list(latest.values())
+        
+        query = """
+            INSERT INTO relations (
+                from_entity_id, to_entity_id, relation_type,
+                attributes, confidence_score
+            )
+            SELECT * FROM UNNEST(
+                %s::uuid[], %s::uuid[], %s::text[], %s::jsonb[], %s::float8[]
+            )
+            ON CONFLICT (from_entity_id, to_entity_id, relation_type)
+            DO UPDATE SET
+                attributes = EXCLUDED.attributes,
+                confidence_score = EXCLUDED.confidence_score,
+                updated_at = NOW()
+            RETURNING id
+        """
+        written = 0
+        for start in range(0, len(rows), page_size):
+            page = rows[start:start + page_size]
+            written += len(self.execute(query, (
+                [str(r['from_entity_id']) for r in page],
+                [str(r['to_entity_id']) for r in page],
+                [r['relation_type'] for r in page],
+                [json.dumps(r.get('attributes') or {}, default=str) for r in page],
+                [r.get('confidence_score', 0.5) for r in page],
+            )))
+        return written
     
     # Event operations
     
@@ -256,6 +650,13 @@ class PostgresClient:
         )
     
     def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
+        """
+        Flush pending demand increments.
+        
+        Connections are returned to the shared pool after every call, so
+        there is no per-client connection left to close.
+        """
+        with self._demand_lock:
+            if self._demand_timer is not None:
+                self._demand_timer.cancel()
+        self.flush_demand_scores()
@@ -5,15 +5,40 @@ Tracks what users are asking for that we don't have good data on.
 This helps prioritize what content to add to the database.
 """
 import json
+import re
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
+from logging_service import get_background_jsonl_writer
+
+# Sequences of capitalized words ("Netflix", "Bela Bajaria")
+_ENTITY_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+
+# Category keywords in priority order (first category wins)
+_CATEGORY_KEYWORDS = [
+    ("executive_search", ["who", "executive", "contact", "email"]),
+    ("mandate_query", ["mandate", "looking for", "buying", "greenlight"]),
+    ("deal_query", ["deal", "production company", "producer"]),
+    ("strategy_query", ["pitch", "how to", "strategy"]),
+    ("news_query", ["recent", "latest", "new", "announced"]),
+]
+_KEYWORD_CATEGORY = {
+    word: (rank, category)
+    for rank, (category, words) in enumerate(_CATEGORY_KEYWORDS)
+    for word in words
+}
+# Zero-width lookahead so overlapping keywords are all reported in one pass
+_CATEGORY_RE = re.compile(
+    "(?=(" + "|".join(re.escape(w) for w in _KEYWORD_CATEGORY) + "))"
+)
 
 class DemandSignalTracker:
     def __init__(self, log_dir: str = "/tmp/mandate_wizard_logs"):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.demand_file = self.log_dir / "demand_signals.jsonl"
+        # Queued so logging a signal never blocks the answer path
+        self._writer = get_background_jsonl_writer(self.demand_file)
     
     def log_demand(self, question: str, response: Dict[str, Any], user_email: str = None):
         """
@@ -60,34 +85,25 @@ class DemandSignalTracker:
                 "category": self._categorize_question(question)
             }
             
-            with open(self.demand_file, "a") as f:
-                f.write(json.dumps(signal) + "\n")
+            self._writer.write(signal)
     
     def _extract_entities_from_question(self, question: str) -> List[str]:
         """Extract potential entity names from question."""
         # Simple heuristic: capitalized words/phrases
-        import re
-        # Find sequences of capitalized words
-        pattern = r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b'
-        entities = re.findall(pattern, question)
+        entities = _ENTITY_RE.findall(question)
         return list(set(entities))
     
     def _categorize_question(self, question: str) -> str:
         """Categorize the type of question."""
-        q_lower = question.lower()
-        
-        if any(word in q_lower for word in ["who", "executive", "contact", "email"]):
-            return "executive_search"
-        elif any(word in q_lower for word in ["mandate", "looking for", "buying", "greenlight"]):
-            return "mandate_query"
-        elif any(word in q_lower for word in ["deal", "production company", "producer"]):
-            return "deal_query"
-        elif any(word in q_lower for word in ["pitch", "how to", "strategy"]):
-            return "strategy_query"
-        elif any(word in q_lower for word in ["recent", "latest", "new", "announced"]):
-            return "news_query"
-        else:
-            return "general"
+        # Single scan over the question; keep the highest-priority category hit
+        best_rank, best_category = len(_CATEGORY_KEYWORDS), "general"
+        for match in _CATEGORY_RE.finditer(question.lower()):
+            rank, category = _KEYWORD_CATEGORY[match.group(1)]
+            if rank < best_rank:
+                best_rank, best_category = rank, category
+                if rank == 0:
+                    break
+        return best_category
     
     def get_top_demands(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get the most common demand signals."""
@@ -6,8 +6,11 @@ backlog = 2048
 
 # Keep to 1 worker unless you have >3–4 GB; model residency matters.
 workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
-worker_class = "sync"
-threads = int(os.environ.get("WEB_THREADS", "1"))
+# Requests are I/O-bound (Postgres, Neo4j, Pinecone, OpenAI); threads let one
+# worker overlap those waits without duplicating process memory.
+worker_class = os.environ.get("WEB_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("WEB_THREADS", "8"))
+worker_connections = int(os.environ.get("WEB_WORKER_CONNECTIONS", "200"))
 
 timeout = int(os.environ.get("WEB_TIMEOUT", "120"))
 keepalive = 2
@@ -17,6 +20,16 @@ preload_app = False
 max_requests = 1000
 max_requests_jitter = 50
 
+def post_fork(server, worker):
+    # Under gevent, make psycopg2 (analytics, worker handlers) yield to other
+    # greenlets while waiting on Postgres; psycopg 3 cooperates natively
+    if worker_class == "gevent":
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning("psycogreen not installed; psycopg2 calls will block the gevent loop")
+
 errorlog = "-"
 accesslog = "-"
 loglevel = os.environ.get("LOG_LEVEL", "info")
@@ -1,23 +1,55 @@
 import os
-from neo4j import GraphDatabase
+import threading
+from contextlib import contextmanager
+from neo4j import GraphDatabase, WRITE_ACCESS
 from config import S
 
 _driver = None
+_driver_lock = threading.Lock()
+
+# Size the pool for every Gunicorn thread in this worker, not a fixed 5
+_POOL_MAX = int(os.getenv(
+    "NEO4J_POOL_MAX",
+    str(max(5, int(os.getenv("WEB_THREADS", "8")) * 4))
+))
 
 def get_driver():
     global _driver
     if _driver is None:
-        _driver = GraphDatabase.driver(
-            S.NEO4J_URI,
-            auth=(S.NEO4J_USER, S.NEO4J_PASSWORD),
-            connection_timeout=10,
-            max_connection_pool_size=5,
-            max_connection_lifetime=30,
-        )
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(
+                    S.NEO4J_URI,
+                    auth=(S.NEO4J_USER, S.NEO4J_PASSWORD),
+                    connection_timeout=10,
+                    max_connection_pool_size=_POOL_MAX,
+                    max_connection_lifetime=30,
+                    connection_acquisition_timeout=5,
+                )
     return _driver
 
+def warm_up():
+    """Open a pooled connection in the background so the first graph query skips the TLS/auth handshake."""
+    def _connect():
+        try:
+            get_driver().verify_connectivity()
+        except Exception as e:
+            print(f"Neo4j warm-up failed: {e}")
+    threading.Thread(target=_connect, name="neo4j-warmup", daemon=True).start()
+
+@contextmanager
+def session(database: str = None, access_mode: str = WRITE_ACCESS):
+    """Borrow a session from the shared driver's connection pool.
+
+    Pass access_mode=READ_ACCESS for lookups so clustered deployments can
+    route them to read replicas.
+    """
+    with get_driver().session(database=database, default_access_mode=access_mode) as s:
+        yield s
+
 def close_driver():
     global _driver
-    if _driver:
-        _driver.close()
-        _driver = None
+    with _driver_lock:
+        if _driver:
+            _driver.close()
+            _driver = None
@@ -0,0 +1,44 @@
+import os
+import threading
+import httpx
+from openai import OpenAI
+from config import S
+
+_client = None
+_client_lock = threading.Lock()
+
+# One keep-alive pool shared by every request/pipeline thread in this process
+_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 multiplexing in httpx)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+def get_client():
+    """Shared OpenAI client; httpx.Client is thread-safe, so threads reuse its connections."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=S.OPENAI_API_KEY,
+                    base_url="https://api.openai.com/v1",
+                    http_client=httpx.Client(
+                        http2=_HTTP2,
+                        limits=httpx.Limits(
+                            max_connections=_MAX_CONNECTIONS,
+                            max_keepalive_connections=_MAX_CONNECTIONS,
+                        ),
+                        timeout=httpx.Timeout(60.0, connect=10.0),
+                    ),
+                )
+    return _client
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client:
+            _client.close()
+            _client = None
@@ -4,12 +4,178 @@ Captures all queries, responses, and user interactions.
 """
 import os
 import json
+import queue
+import atexit
 import logging
+import hashlib
+import threading
+import numpy as np
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Union
 from pathlib import Path
 
 
+class AppendWriter:
+    """
+    Append-only file writer that keeps its file descriptor open.
+    
+    Each record is written with a single os.write() on an O_APPEND
+    descriptor, so concurrent writers (threads or Gunicorn workers)
+    never interleave partial records and no open/close happens per event.
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._fd = None
+        self._lock = threading.Lock()
+    
+    def append(self, data: bytes):
+        """Append one record's bytes to the file."""
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            view = memoryview(data)
+            while view:
+                written = os.write(self._fd, view)
+                view = view[written:]
+    
+    def close(self):
+        """Close the underlying file descriptor."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class JsonlWriter(AppendWriter):
+    """AppendWriter for JSONL files: one JSON object per line."""
+    
+    def write(self, entry: Dict[str, Any]):
+        """Append one JSON object as a line."""
+        self.append((json.dumps(entry) + "\n").encode("utf-8"))
+
+
+class BackgroundJsonlWriter(JsonlWriter):
+    """
+    JsonlWriter whose write() only enqueues.
+    
+    A daemon thread drains the queue and appends up to batch_size lines (or
+    whatever arrived within flush_interval seconds) with one os.write(), so
+    callers on the request path never touch the filesystem.
+    """
+    
+    def __init__(self, path: Union[str, Path], batch_size: int = 100, flush_interval: float = 1.0):
+        super().__init__(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"jsonl-{self.path.name}", daemon=True)
+        self._thread.start()
+    
+    def write(self, entry: Dict[str, Any]):
+        """Queue one JSON object to be appended as a line."""
+        self._queue.put_nowait(entry)
+    
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            lines = [json.dumps(entry) + "\n"]
+            stop = False
+            try:
+                while len(lines) < self.batch_size:
+                    entry = self._queue.get(timeout=self.flush_interval)
+                    if entry is None:
+                        stop = True
+                        break
+                    lines.append(json.dumps(entry) + "\n")
+            except queue.Empty:
+                pass
+            try:
+                self.append("".join(lines).encode("utf-8"))
+            except OSError as e:
+                logging.getLogger("mandate_wizard").error(f"Failed to write {self.path}: {e}")
+            if stop:
+                return
+    
+    def close(self):
+        """Flush queued entries, stop the thread and close the file."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+        super().close()
+
+
+_writers: Dict[str, AppendWriter] = {}
+_writers_lock = threading.Lock()
+
+def _get_writer(path: Union[str, Path], cls: type) -> AppendWriter:
+    """Get the shared writer for a file (one per path per process)."""
+    key = str(path)
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                writer = cls(path)
+                _writers[key] = writer
+    return writer
+
+def get_jsonl_writer(path: Union[str, Path]) -> JsonlWriter:
+    """Get the shared writer for a JSONL file (one per path per process)."""
+    return _get_writer(path, JsonlWriter)
+
+def get_background_jsonl_writer(path: Union[str, Path]) -> BackgroundJsonlWriter:
+    """Get the shared queued writer for a JSONL file (one per path per process)."""
+    return _get_writer(path, BackgroundJsonlWriter)
+
+@atexit.register
+def _close_jsonl_writers():
+    for writer in list(_writers.values()):
+        writer.close()
+
+
+def _iter_jsonl_reverse(path: Union[str, Path], chunk: int = 1 << 16) -> Iterator[bytes]:
+    """
+    Yield the lines of a JSONL file from last to first.
+    
+    Reads fixed-size chunks backwards from the end of the file, so callers
+    that stop early only pay for the tail they actually consume.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        remainder = b""
+        while pos > 0:
+            step = min(chunk, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + remainder).split(b"\n")
+            # First piece may be a partial line; carry it into the next chunk
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if remainder:
+            yield remainder
+
+
+# Fixed-size per-query record mirrored next to queries.jsonl so stats can be
+# aggregated column-wise without parsing JSON. Fields share one record so
+# concurrent appends from several workers can never misalign columns.
+QUERY_STATS_DTYPE = np.dtype([
+    ("ts_ms", "<i8"),        # UTC timestamp, milliseconds
+    ("user", "<i8"),         # 64-bit hash of user email
+    ("latency_ms", "<f4"),
+    ("confidence", "<f4"),
+])
+
+def _user_hash(email: Optional[str]) -> int:
+    digest = hashlib.blake2b((email or "").encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
 class QueryLogger:
     """Logs all queries and responses with detailed metadata."""
     
@@ -23,6 +189,11 @@ class QueryLogger:
         
         # Set up structured JSON logging
         self.json_log_file = self.log_dir / "queries.jsonl"
+        self._query_writer = get_jsonl_writer(self.json_log_file)
+        self.stats_file = self.log_dir / "queries.stats.bin"
+        self._stats_writer = _get_writer(self.stats_file, AppendWriter)
+        self._auth_writer = get_jsonl_writer(self.log_dir / "auth.jsonl")
+        self._error_writer = get_jsonl_writer(self.log_dir / "errors.jsonl")
         
         self.logger = logging.getLogger("mandate_wizard")
     
@@ -83,8 +254,16 @@ class QueryLogger:
         }
         
         # Write to JSONL file (one JSON object per line)
-        with open(self.json_log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        self._query_writer.write(log_entry)
+        
+        # Columnar sidecar used by get_query_stats
+        record = np.array([(
+            int(timestamp.timestamp() * 1000),
+            _user_hash(user_email),
+            log_entry["response"]["latency_ms"] or 0,
+            log_entry["response"]["confidence"] or 0,
+        )], dtype=QUERY_STATS_DTYPE)
+        self._stats_writer.append(record.tobytes())
         
         # Also log to standard logger
         self.logger.info(
@@ -118,9 +297,7 @@ class QueryLogger:
             "reason": reason
         }
         
-        auth_log_file = self.log_dir / "auth.jsonl"
-        with open(auth_log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        self._auth_writer.write(log_entry)
         
         status = "SUCCESS" if success else "FAILED"
         self.logger.info(f"Auth {status}: {email} via {method}" + (f" - {reason}" if reason else ""))
@@ -150,9 +327,7 @@ class QueryLogger:
             "context": context or {}
         }
         
-        error_log_file = self.log_dir / "errors.jsonl"
-        with open(error_log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
+        self._error_writer.write(log_entry)
         
         self.logger.error(f"Error for {user_email}: {error_type} - {error_message}")
     
@@ -171,26 +346,13 @@ class QueryLogger:
         
         cutoff_time = datetime.utcnow().timestamp() - (hours * 3600)
         
-        queries = []
-        with open(self.json_log_file, "r") as f:
-            for line in f:
-                try:
-                    entry = json.loads(line)
-                    entry_time = datetime.fromisoformat(entry["timestamp"]).timestamp()
-                    if entry_time >= cutoff_time:
-                        queries.append(entry)
-                except:
-                    continue
-        
-        if not queries:
+        stats = self._query_stats_from_sidecar(cutoff_time)
+        if stats is None:
+            stats = self._query_stats_from_jsonl(cutoff_time)
+        if stats is None:
             return {"total_queries": 0}
         
-        # Calculate statistics
-        total_queries = len(queries)
-        unique_users = len(set(q["user"]["email"] for q in queries))
-        avg_latency = sum(q["response"]["latency_ms"] for q in queries) / total_queries
-        avg_confidence = sum(q["response"]["confidence"] or 0 for q in queries) / total_queries
-        
+        total_queries, unique_users, avg_latency, avg_confidence = stats
         return {
             "total_queries": total_queries,
             "unique_users": unique_users,
@@ -198,6 +360,62 @@ class QueryLogger:
             "avg_confidence": round(avg_confidence, 3),
             "time_period_hours": hours
         }
+    
+    def _query_stats_from_sidecar(self, cutoff_time: float):
+        """
+        Aggregate the window from the columnar sidecar with NumPy.
+        
+        Returns None when the sidecar is missing or starts after the cutoff
+        (older entries then only exist in queries.jsonl).
+        """
+        if not self.stats_file.exists():
+            return None
+        count = self.stats_file.stat().st_size // QUERY_STATS_DTYPE.itemsize
+        if count == 0:
+            return None
+        
+        records = np.memmap(self.stats_file, dtype=QUERY_STATS_DTYPE, mode="r", shape=(count,))
+        ts = records["ts_ms"]
+        cutoff_ms = int(cutoff_time * 1000)
+        if ts[0] > cutoff_ms:
+            return None
+        
+        mask = ts >= cutoff_ms
+        total_queries = int(np.count_nonzero(mask))
+        if total_queries == 0:
+            return None
+        
+        window = records[mask]
+        return (
+            total_queries,
+            int(np.unique(window["user"]).size),
+            float(window["latency_ms"].mean(dtype=np.float64)),
+            float(window["confidence"].mean(dtype=np.float64)),
+        )
+    
+    def _query_stats_from_jsonl(self, cutoff_time: float):
+        """Aggregate the window by parsing queries.jsonl from the end."""
+        # Entries are appended in time order, so walk back from the end
+        # and stop at the first one older than the window.
+        queries = []
+        for line in _iter_jsonl_reverse(self.json_log_file):
+            try:
+                entry = json.loads(line)
+                entry_time = datetime.fromisoformat(entry["timestamp"]).timestamp()
+            except:
+                continue
+            if entry_time < cutoff_time:
+                break
+            queries.append(entry)
+        
+        if not queries:
+            return None
+        
+        total_queries = len(queries)
+        unique_users = len(set(q["user"]["email"] for q in queries))
+        avg_latency = sum(q["response"]["latency_ms"] for q in queries) / total_queries
+        avg_confidence = sum(q["response"]["confidence"] or 0 for q in queries) / total_queries
+        return (total_queries, unique_users, avg_latency, avg_confidence)
 
 
 # Global logger instance
@@ -7,21 +7,54 @@ Newsletter processing pipeline for Mandate Wizard.
 - Ingests to Pinecone + Neo4j
 """
 import os
+import re
 import base64
-import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from openai import OpenAI
-from data_schemas import validate_card
+from config import S
+from infra.openai_client import get_client
+from data_schemas import validate_card, build_embed_text
 from rag.embedder import get_embedder
 from rag.retrievers.pinecone_retriever import PineconeRetriever
 from rag.graph.dao import Neo4jDAO
 
+try:
+    import orjson
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    import json
+    json_loads = json.loads
+
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, default=str)
+
+try:
+    import tiktoken
+    _enc = tiktoken.encoding_for_model("gpt-4o-mini")
+except ImportError:
+    _enc = None
+
 # Initialize clients
-client = OpenAI(api_key=os.environ["OPENAI_API_KEY"], base_url=\'https://api.openai.com/v1\')
+client = get_client()  # shared across the extraction threads
 embedder = get_embedder()
 retriever = PineconeRetriever()
 graph = Neo4jDAO()
 
+# LLM extraction and ingestion are network-bound; run this many at once
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "8"))
+INGEST_BATCH_SIZE = 100
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", str(PIPELINE_WORKERS)))  # embed/upsert batches in flight
+
+# Extraction windows over long newsletters; overlap keeps cards that straddle
+# a boundary whole in at least one window
+EXTRACT_CHUNK_TOKENS = 3000
+EXTRACT_CHUNK_OVERLAP = 200
+
 NEWSLETTER_SOURCES = [
     "Hollywood Signal",
     "Deadline",
@@ -30,32 +63,64 @@ NEWSLETTER_SOURCES = [
     "Puck",
     "The Wrap",
 ]
+# One alternation scans a sender once instead of once per source
+_SENDER_RE = re.compile("|".join(re.escape(s) for s in NEWSLETTER_SOURCES))
 
-def fetch_emails(days=7):
-    """Fetch recent emails from Gmail MCP."""
+# Gmail's batch endpoint accepts at most 100 sub-requests per HTTP call
+GMAIL_BATCH_SIZE = 100
+
+def _mcp_call(tool, payload):
+    """Invoke a Gmail MCP tool; returns parsed JSON or None on failure."""
     import subprocess
     
-    # Calculate date range
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    query = f"after:{start_date.strftime(\"%Y/%m/%d\")} before:{end_date.strftime(\"%Y/%m/%d\")}"
-    
-    # Call Gmail MCP
     cmd = [
-        "manus-mcp-cli", "tool", "call", "search_messages",
+        "manus-mcp-cli", "tool", "call", tool,
         "--server", "gmail",
-        "--input", json.dumps({"query": query, "max_results": 100})
+        "--input", json_dumps(payload)
     ]
     result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode != 0:
-        print(f"Error fetching emails: {result.stderr}")
+        print(f"Error calling {tool}: {result.stderr}")
+        return None
+    return json_loads(result.stdout)
+
+def fetch_emails(days=7):
+    """Fetch recent emails from Gmail MCP."""
+    # Calculate date range
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    query = f"after:{start_date.strftime('%Y/%m/%d')} before:{end_date.strftime('%Y/%m/%d')}"
+    
+    # List IDs only, then pull full messages GMAIL_BATCH_SIZE at a time
+    listed = _mcp_call("search_messages", {
+        "query": query, "max_results": 100, "format": "minimal"
+    })
+    if listed is None:
         return []
+    ids = [m["id"] for m in listed if m.get("id")]
+    
+    messages = []
+    for i in range(0, len(ids), GMAIL_BATCH_SIZE):
+        messages.extend(fetch_emails_batch(ids[i:i + GMAIL_BATCH_SIZE]))
     
-    messages = json.loads(result.stdout)
     print(f"Fetched {len(messages)} messages from Gmail")
     return messages
 
+def fetch_emails_batch(ids):
+    """Fetch full messages for up to GMAIL_BATCH_SIZE IDs in one round-trip."""
+    batch = _mcp_call("messages_batch_get", {"ids": ids, "format": "full"})
+    if batch is not None:
+        return batch
+    
+    # Batch tool unavailable: fall back to concurrent single-message calls
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as ex:
+        fetched = ex.map(
+            lambda mid: _mcp_call("get_message", {"id": mid, "format": "full"}),
+            ids,
+        )
+        return [m for m in fetched if m]
+
 def parse_newsletter(message):
     """Parse a single newsletter email."""
     snippet = message.get("snippet", "")
@@ -70,8 +135,7 @@ def parse_newsletter(message):
             break
     
     # Check if it's a target newsletter
-    is_target = any(source in sender for source in NEWSLETTER_SOURCES)
-    if not is_target:
+    if not _SENDER_RE.search(sender):
         return None
     
     # Get email body
@@ -94,65 +158,159 @@ def parse_newsletter(message):
     print(f"Parsing newsletter from: {sender}")
     return body
 
+def chunk_content(content):
+    """Split newsletter text into overlapping EXTRACT_CHUNK_TOKENS windows."""
+    step = EXTRACT_CHUNK_TOKENS - EXTRACT_CHUNK_OVERLAP
+    if _enc is None:
+        # No tokenizer: ~4 characters per token
+        size, step = EXTRACT_CHUNK_TOKENS * 4, step * 4
+        return [content[i:i + size] for i in range(0, max(len(content) - EXTRACT_CHUNK_OVERLAP * 4, 1), step)]
+    
+    tokens = _enc.encode(content)
+    return [
+        _enc.decode(tokens[i:i + EXTRACT_CHUNK_TOKENS])
+        for i in range(0, max(len(tokens) - EXTRACT_CHUNK_OVERLAP, 1), step)
+    ]
+
+def card_key(card):
+    """Identity of an extracted card, for de-duplicating overlapping windows."""
+    return (card.get("type"), card.get("name") or card.get("title"))
+
 def extract_structured_data(content):
     """Use LLM to extract structured data from newsletter content."""
-    prompt = f"""Extract structured data from this newsletter content. Identify the card type (executive, mandate, news, etc.) and extract all relevant fields based on the provided schemas. Return a list of JSON objects.
+    prompt = f"""Extract structured data from this newsletter content. Identify the card type (executive, mandate, news, etc.) and extract all relevant fields based on the provided schemas. Return the cards as JSON.
 
     Content:
-    {content[:4000]}
+    {content}
 
     Schemas:
     - Executive: name, title, company, region, bio, mandate, etc.
     - Mandate: platform, department, summary, genres, etc.
     - News/Deal: title, date, platform, executives, etc.
 
-    Return a list of JSON objects, one for each card found.
+    Return a JSON object with a "cards" array containing one object per card found.
     """
     
     response = client.chat.completions.create(
         model="gpt-4o-mini",
         temperature=0.1,
-        messages=[{"role":"system","content":"You are a data extraction expert."},{"role":"user","content":prompt}]
+        response_format={"type": "json_object"},
+        messages=[{"role":"system","content":"You are a data extraction expert. Return a JSON object with a `cards` array."},{"role":"user","content":prompt}]
     )
     
     try:
-        extracted_data = json.loads(response.choices[0].message.content)
-        if isinstance(extracted_data, list):
-            return extracted_data
+        extracted_data = json_loads(response.choices[0].message.content)
+        cards = extracted_data.get("cards", extracted_data)
+        if isinstance(cards, list):
+            return cards
         else:
-            return [extracted_data]
+            return [cards]
     except Exception as e:
         print(f"Error parsing LLM response: {e}")
         return []
 
-def ingest_card(card_data):
-    """Validate and ingest a single card to Pinecone and Neo4j."""
+def validate_and_prepare(card_data):
+    """Validate a card and build its embedding text. Returns (validated_data, text) or None."""
     try:
-        # Validate schema
         validated_data = validate_card(card_data)
-        
-        # Generate embedding
-        text_to_embed = json.dumps(validated_data)
-        embedding = embedder.embed(text_to_embed)
+        return validated_data, build_embed_text(validated_data)
+    except Exception as e:
+        print(f"  Error validating card: {e}")
+        return None
+
+def ingest_to_graph(validated_data):
+    """Ingest a single validated card to Neo4j (simplified)."""
+    if validated_data["type"] == "executive":
+        graph.upsert_person(validated_data["name"], validated_data["title"], validated_data["company"])
+    elif validated_data["type"] == "company":
+        graph.upsert_company(validated_data["name"])
+
+class IngestLedger:
+    """
+    Content hash of every card as last upserted, persisted in SQLite.
+    
+    Reruns over the same newsletters skip cards whose validated data is
+    unchanged, so they cost neither a Pinecone upsert nor a graph write.
+    """
+    
+    def __init__(self, path):
+        import sqlite3
+        self._lock = threading.Lock()  # shared by the ingest threads
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS ingested(id TEXT PRIMARY KEY, h BLOB)")
+        self.conn.commit()
+    
+    def unchanged(self, items):
+        """IDs among (id, hash) pairs whose stored hash matches."""
+        found = set()
+        with self._lock:
+            for b in range(0, len(items), 500):  # SQLite bound-parameter limit
+                chunk = dict(items[b:b + 500])
+                rows = self.conn.execute(
+                    f"SELECT id, h FROM ingested WHERE id IN ({','.join('?' * len(chunk))})",
+                    tuple(chunk),
+                ).fetchall()
+                found.update(i for i, h in rows if h == chunk[i])
+        return found
+    
+    def record(self, items):
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO ingested(id, h) VALUES (?, ?)", items)
+            self.conn.commit()
+
+ledger = IngestLedger(S.INGEST_LEDGER_DB) if S.INGEST_LEDGER_DB else None
+
+def content_hash(validated_data):
+    """Stable digest of a validated card (pydantic field order is fixed)."""
+    return hashlib.blake2b(json_dumps(validated_data).encode("utf-8"), digest_size=16).digest()
+
+def ingest_batch(cards):
+    """
+    Validate and ingest a batch of cards.
+    
+    All embeddings for the batch come from one embeddings request and all
+    vectors go to Pinecone in one upsert. Returns the number ingested.
+    """
+    prepared = [p for p in (validate_and_prepare(c) for c in cards) if p]
+    hashes = None
+    if ledger is not None and prepared:
+        hashes = [(v["id"], content_hash(v)) for v, _ in prepared]
+        skip = ledger.unchanged(hashes)
+        if skip:
+            print(f"  Skipping {len(skip)} unchanged cards")
+            keep = [i for i, (v, _) in enumerate(prepared) if v["id"] not in skip]
+            prepared = [prepared[i] for i in keep]
+            hashes = [hashes[i] for i in keep]
+    if not prepared:
+        return 0
+    
+    validated = [v for v, _ in prepared]
+    try:
+        # Generate embeddings
+        embeddings = embedder.embed([text for _, text in prepared])
         
         # Ingest to Pinecone
-        retriever.upsert(
-            id=validated_data["id"],
-            vector=embedding,
-            metadata=validated_data
+        retriever.upsert_batch(
+            ids=[v["id"] for v in validated],
+            vectors=embeddings,
+            metadatas=validated
         )
-        
-        # Ingest to Neo4j (simplified)
-        if validated_data["type"] == "executive":
-            graph.upsert_person(validated_data["name"], validated_data["title"], validated_data["company"])
-        elif validated_data["type"] == "company":
-            graph.upsert_company(validated_data["name"])
-        
-        print(f"  Ingested card: {validated_data["id"]}")
-        return True
     except Exception as e:
-        print(f"  Error ingesting card: {e}")
-        return False
+        print(f"  Error ingesting batch of {len(validated)} cards: {e}")
+        return 0
+    if hashes is not None:
+        ledger.record(hashes)
+    
+    ingested = 0
+    for validated_data in validated:
+        try:
+            ingest_to_graph(validated_data)
+            print(f"  Ingested card: {validated_data['id']}")
+            ingested += 1
+        except Exception as e:
+            print(f"  Error ingesting card {validated_data['id']}: {e}")
+    return ingested
 
 def run_pipeline():
     """Run the full newsletter processing pipeline."""
@@ -162,21 +320,40 @@ def run_pipeline():
     messages = fetch_emails(days=7)
     
     # 2. Parse newsletters
-    all_cards = []
-    for msg in messages:
-        content = parse_newsletter(msg)
-        if content:
-            # 3. Extract structured data
-            cards = extract_structured_data(content)
-            all_cards.extend(cards)
-    
-    print(f"Extracted {len(all_cards)} potential cards from newsletters")
-    
-    # 4. Ingest to database
-    ingested_count = 0
-    for card in all_cards:
-        if ingest_card(card):
-            ingested_count += 1
+    contents = [c for c in (parse_newsletter(msg) for msg in messages) if c]
+    
+    # Split long newsletters into token windows, remembering the source
+    chunks = [(n, chunk) for n, content in enumerate(contents) for chunk in chunk_content(content)]
+    
+    # Extraction (LLM) and ingestion (embed + upsert) overlap: each full
+    # batch of cards is handed to the ingest pool as soon as it exists, so
+    # the embedding API and Pinecone work while later windows are extracted
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as ex, \
+            ThreadPoolExecutor(max_workers=INGEST_WORKERS) as ingest_ex:
+        # 3. Extract structured data (one LLM call per window, concurrently)
+        extracted = 0
+        batch = []
+        ingest_futures = []
+        seen = set()
+        for (n, _), cards in zip(chunks, ex.map(extract_structured_data, [c for _, c in chunks])):
+            for card in cards:
+                key = card_key(card) if isinstance(card, dict) else None
+                # Same card from two overlapping windows of one newsletter
+                if key and key[1]:
+                    if (n, key) in seen:
+                        continue
+                    seen.add((n, key))
+                extracted += 1
+                batch.append(card)
+                # 4. Ingest to database, INGEST_BATCH_SIZE cards per embed/upsert call
+                if len(batch) == INGEST_BATCH_SIZE:
+                    ingest_futures.append(ingest_ex.submit(ingest_batch, batch))
+                    batch = []
+        if batch:
+            ingest_futures.append(ingest_ex.submit(ingest_batch, batch))
+        
+        print(f"Extracted {extracted} potential cards from newsletters")
+        ingested_count = sum(f.result() for f in ingest_futures)
     
     print(f"Pipeline complete. Ingested {ingested_count} new/updated cards.")
 
@@ -4,12 +4,17 @@ Prioritization API Endpoints
 REST API for accessing entity update priorities and schedules.
 """
 
+import os
+import threading
+from functools import wraps
 from flask import Blueprint, jsonify, request
 from .priority_engine import PriorityEngine, UpdatePriority
 try:
     from database.postgres_client import PostgresClient
+    from cache.cache_manager import get_cache_manager
 except ImportError:
     from ..database.postgres_client import PostgresClient
+    from ..cache.cache_manager import get_cache_manager
 
 # Create blueprint
 priority_bp = Blueprint('priority', __name__, url_prefix='/api/priority')
@@ -23,12 +28,134 @@ priority_engine = PriorityEngine(
     critical_demand_threshold=10
 )
 
+_pg_client = None
+_pg_client_lock = threading.Lock()
+
 def get_pg_client():
-    """Get PostgreSQL client instance"""
-    return PostgresClient()
+    """
+    Get the shared PostgreSQL client instance.
+    
+    One client per process so its demand coalescing and entity cache
+    span requests; the connection pool underneath is process-wide anyway.
+    """
+    global _pg_client
+    if _pg_client is None:
+        with _pg_client_lock:
+            if _pg_client is None:
+                _pg_client = PostgresClient()
+    return _pg_client
+
+
+# Columns returned by /entity/<entity_id> alongside its priority
+ENTITY_PRIORITY_FIELDS = (
+    'id', 'name', 'entity_type', 'demand_score', 'query_count',
+    'last_queried_at', 'updated_at', 'created_at',
+)
+
+
+# Priorities move with demand and age in days; a few minutes stale is fine
+PRIORITY_CACHE_TTL = int(os.getenv('PRIORITY_CACHE_TTL', '300'))
+
+
+def cached_response(func):
+    """
+    Serve a handler's successful JSON response from Redis for
+    PRIORITY_CACHE_TTL seconds, keyed on path + query string.
+    
+    Caching is skipped when REDIS_HOST is not configured.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not os.getenv('REDIS_HOST'):
+            return func(*args, **kwargs)
+        
+        # Every (name, value) pair, repeated args included
+        query_args = list(request.args.items(multi=True))
+        
+        # A cache failure degrades to an uncached response, never a 500
+        try:
+            cache = get_cache_manager()
+            payload = cache.get_priority_response(request.path, query_args)
+        except Exception as e:
+            print(f"Priority cache lookup failed: {e}")
+            cache = payload = None
+        if payload is not None:
+            return jsonify(payload), 200
+        
+        response, status = func(*args, **kwargs)
+        if status == 200 and cache is not None:
+            try:
+                cache.set_priority_response(
+                    request.path, query_args, response.get_json(), PRIORITY_CACHE_TTL
+                )
+            except Exception as e:
+                print(f"Priority cache store failed: {e}")
+        return response, status
+    
+    return wrapper
+
+
+# Same formula as PriorityEngine.calculate_priority_score/classify_priority,
+# evaluated in Postgres so only the rows a response needs leave the database.
+# Callers append WHERE/ORDER BY/LIMIT against the priority_score and
+# priority_tier columns.
+PRIORITY_QUERY = """
+    WITH base AS (
+        SELECT id, name, entity_type, demand_score, query_count,
+               last_queried_at, updated_at, created_at,
+               EXTRACT(EPOCH FROM (LOCALTIMESTAMP - updated_at))::float8 / 86400 AS age_days,
+               EXTRACT(EPOCH FROM (LOCALTIMESTAMP - last_queried_at))::float8 / 86400 AS days_since_query
+        FROM entities
+        {where}
+    ), scored AS (
+        SELECT *,
+               ROUND((
+                   %(demand_weight)s * LEAST(LOG(COALESCE(demand_score, 0) + 1) * 20, 100)
+                 + %(freshness_weight)s * COALESCE(LEAST(age_days * %(inv_stale)s, 100), 100)
+                 + %(trending_weight)s * CASE
+                       WHEN COALESCE(query_count, 0) = 0 THEN 0
+                       WHEN days_since_query <= 1 THEN 100
+                       WHEN days_since_query <= 7 THEN 70
+                       WHEN days_since_query <= 30 THEN 30
+                       ELSE 0
+                   END
+               )::numeric, 2)::float8 AS priority_score
+        FROM base
+    ), ranked AS (
+        SELECT id, name, entity_type, demand_score, query_count,
+               last_queried_at, updated_at, created_at, priority_score,
+               CASE
+                   WHEN COALESCE(demand_score, 0) >= %(critical_demand)s
+                        AND age_days >= %(stale_days)s THEN 'CRITICAL'
+                   WHEN priority_score >= 70 THEN 'HIGH'
+                   WHEN priority_score >= 40 THEN 'MEDIUM'
+                   WHEN priority_score >= 20 THEN 'LOW'
+                   ELSE 'DEFERRED'
+               END AS priority_tier
+        FROM scored
+    )
+    SELECT * FROM ranked
+"""
+
+# Highest priority first; ties fall back to the old fetch order
+PRIORITY_ORDER = " ORDER BY priority_score DESC, demand_score DESC, updated_at ASC"
+
+
+def priority_query(where: str = "", **params):
+    """Build the scored entities query and its parameters."""
+    params.update(
+        demand_weight=priority_engine.demand_weight,
+        freshness_weight=priority_engine.freshness_weight,
+        trending_weight=priority_engine.trending_weight,
+        stale_days=priority_engine.stale_threshold_days,
+        inv_stale=priority_engine._inv_stale,
+        critical_demand=priority_engine.critical_demand_threshold,
+    )
+    return PRIORITY_QUERY.format(where=where), params
 
 
 @priority_bp.route('/batch', methods=['GET'])
+@cached_response
 def get_update_batch():
     """
     Get a batch of entities to update, prioritized by urgency.
@@ -58,38 +185,29 @@ def get_update_batch():
                     'valid_tiers': [p.name for p in UpdatePriority]
                 }), 400
         
-        # Build query
-        query = """
-            SELECT id, name, entity_type, demand_score, query_count,
-                   last_queried_at, updated_at, created_at
-            FROM entities
-        """
-        
-        params = []
+        # Build query: score, filter and take the top N in Postgres
+        query, params = priority_query(
+            "WHERE entity_type = %(entity_type)s" if entity_type else "",
+            entity_type=entity_type,
+            limit=limit,
+        )
         
-        if entity_type:
-            query += " WHERE entity_type = %s"
-            params.append(entity_type)
+        if min_priority:
+            query += " WHERE priority_tier = ANY(%(tiers)s)"
+            params['tiers'] = [p.name for p in UpdatePriority if p.value <= min_priority.value]
         
-        query += " ORDER BY demand_score DESC, updated_at ASC"
+        query += PRIORITY_ORDER + " LIMIT %(limit)s"
         
         # Execute query
-        entities = get_pg_client().execute(query, tuple(params) if params else None)
+        batch = get_pg_client().execute(query, params, dict_rows=True)
         
-        if not entities:
+        if not batch:
             return jsonify({
                 'batch': [],
                 'total': 0,
                 'limit': limit
             }), 200
         
-        # Get prioritized batch
-        batch = priority_engine.get_update_batch(
-            entities, 
-            batch_size=limit,
-            min_priority=min_priority
-        )
-        
         return jsonify({
             'batch': batch,
             'total': len(batch),
@@ -102,6 +220,7 @@ def get_update_batch():
 
 
 @priority_bp.route('/critical', methods=['GET'])
+@cached_response
 def get_critical_entities():
     """
     Get entities that require immediate updates (CRITICAL priority).
@@ -112,26 +231,21 @@ def get_critical_entities():
         JSON with list of critical entities
     """
     try:
-        # Query entities with demand
-        query = """
-            SELECT id, name, entity_type, demand_score, query_count,
-                   last_queried_at, updated_at, created_at
-            FROM entities
-            WHERE demand_score > 0
-            ORDER BY demand_score DESC
-        """
-        
-        entities = get_pg_client().execute(query)
-        
-        if not entities:
+        # Only stale high-demand rows qualify, so filter before scoring
+        query, params = priority_query("""
+            WHERE demand_score >= %(critical_demand)s
+              AND updated_at <= LOCALTIMESTAMP - make_interval(days => %(stale_days)s)
+        """)
+        query += PRIORITY_ORDER
+        
+        critical = get_pg_client().execute(query, params, dict_rows=True)
+        
+        if not critical:
             return jsonify({
                 'critical_entities': [],
                 'total': 0
             }), 200
         
-        # Get critical entities
-        critical = priority_engine.get_critical_entities(entities)
-        
         return jsonify({
             'critical_entities': critical,
             'total': len(critical),
@@ -146,6 +260,7 @@ def get_critical_entities():
 
 
 @priority_bp.route('/schedule', methods=['GET'])
+@cached_response
 def get_update_schedule():
     """
     Generate a multi-day update schedule based on priority.
@@ -162,23 +277,17 @@ def get_update_schedule():
         daily_budget = int(request.args.get('daily_budget', 500))
         entity_type = request.args.get('entity_type', '')
         
-        # Build query
-        query = """
-            SELECT id, name, entity_type, demand_score, query_count,
-                   last_queried_at, updated_at, created_at
-            FROM entities
-        """
-        
-        params = []
-        
-        if entity_type:
-            query += " WHERE entity_type = %s"
-            params.append(entity_type)
+        # Build query (already ranked by priority)
+        query, params = priority_query(
+            "WHERE entity_type = %(entity_type)s" if entity_type else "",
+            entity_type=entity_type,
+        )
+        query += PRIORITY_ORDER
         
         # Execute query
-        entities = get_pg_client().execute(query, tuple(params) if params else None)
+        ranked = get_pg_client().execute(query, params, dict_rows=True)
         
-        if not entities:
+        if not ranked:
             return jsonify({
                 'schedule': {},
                 'total_entities': 0,
@@ -186,11 +295,11 @@ def get_update_schedule():
                 'daily_budget': daily_budget
             }), 200
         
-        # Generate schedule
-        schedule = priority_engine.generate_update_schedule(
-            entities,
-            daily_budget=daily_budget
-        )
+        # Generate schedule: consecutive daily_budget slices of the ranking
+        schedule = {
+            f"day_{day}": ranked[i:i + daily_budget]
+            for day, i in enumerate(range(0, len(ranked), daily_budget), start=1)
+        }
         
         # Calculate summary
         total_days = len(schedule)
@@ -209,6 +318,7 @@ def get_update_schedule():
 
 
 @priority_bp.route('/statistics', methods=['GET'])
+@cached_response
 def get_priority_statistics():
     """
     Get statistics about priority distribution across all entities.
@@ -223,23 +333,19 @@ def get_priority_statistics():
         # Get parameters
         entity_type = request.args.get('entity_type', '')
         
-        # Build query
-        query = """
-            SELECT id, name, entity_type, demand_score, query_count,
-                   last_queried_at, updated_at, created_at
-            FROM entities
-        """
-        
-        params = []
-        
-        if entity_type:
-            query += " WHERE entity_type = %s"
-            params.append(entity_type)
-        
-        # Execute query
-        entities = get_pg_client().execute(query, tuple(params) if params else None)
+        # Aggregate tiers and fetch the top 10 in Postgres
+        query, params = priority_query(
+            "WHERE entity_type = %(entity_type)s" if entity_type else "",
+            entity_type=entity_type,
+        )
+        pg = get_pg_client()
+        tier_rows = pg.execute(
+            f"SELECT priority_tier, COUNT(*) AS n, SUM(priority_score) AS total"
+            f" FROM ({query}) s GROUP BY priority_tier",
+            params, dict_rows=True
+        )
         
-        if not entities:
+        if not tier_rows:
             return jsonify({
                 'total_entities': 0,
                 'avg_priority_score': 0,
@@ -247,8 +353,32 @@ def get_priority_statistics():
                 'top_10_entities': []
             }), 200
         
+        top_10 = pg.execute(
+            query + PRIORITY_ORDER + " LIMIT 10", params, dict_rows=True
+        )
+        
         # Get statistics
-        stats = priority_engine.get_statistics(entities)
+        tier_counts = {priority.name: 0 for priority in UpdatePriority}
+        for row in tier_rows:
+            tier_counts[row['priority_tier']] = row['n']
+        total_entities = sum(tier_counts.values())
+        avg_priority_score = sum(row['total'] for row in tier_rows) / total_entities
+        
+        stats = {
+            'total_entities': total_entities,
+            'avg_priority_score': round(avg_priority_score, 2),
+            'tier_distribution': tier_counts,
+            'top_10_entities': [
+                {
+                    'id': e['id'],
+                    'name': e['name'],
+                    'priority_score': e['priority_score'],
+                    'priority_tier': e['priority_tier'],
+                    'demand_score': e['demand_score'] or 0
+                }
+                for e in top_10
+            ]
+        }
         
         # Add filter info
         stats['entity_type'] = entity_type if entity_type else 'all'
@@ -271,24 +401,18 @@ def get_entity_priority(entity_id):
         JSON with entity priority details
     """
     try:
-        # Query entity
-        query = """
-            SELECT id, name, entity_type, demand_score, query_count,
-                   last_queried_at, updated_at, created_at
-            FROM entities
-            WHERE id = %s
-        """
-        
-        entities = get_pg_client().execute(query, (entity_id,))
+        # Query entity (through the shared client's entity cache)
+        row = get_pg_client().get_entity(entity_id=entity_id)
         
-        if not entities:
+        if not row:
             return jsonify({'error': 'Entity not found'}), 404
         
-        entity = entities[0]
+        entity = {k: row.get(k) for k in ENTITY_PRIORITY_FIELDS}
         
-        # Calculate priority
-        priority_score = priority_engine.calculate_priority_score(entity)
-        priority_tier = priority_engine.classify_priority(entity)
+        # Calculate priority (timestamps parsed and score computed once)
+        ctx = priority_engine._precompute(entity)
+        priority_score = priority_engine.calculate_priority_score(entity, ctx)
+        priority_tier = priority_engine.classify_priority(entity, ctx, priority_score)
         
         # Add priority info to entity
         entity['priority_score'] = priority_score
@@ -298,9 +422,9 @@ def get_entity_priority(entity_id):
         return jsonify({
             'entity': entity,
             'priority_breakdown': {
-                'demand_component': priority_engine._calculate_demand_score(entity),
-                'freshness_component': priority_engine._calculate_freshness_score(entity),
-                'trending_component': priority_engine._calculate_trending_score(entity)
+                'demand_component': priority_engine._calculate_demand_score(ctx),
+                'freshness_component': priority_engine._calculate_freshness_score(ctx),
+                'trending_component': priority_engine._calculate_trending_score(ctx)
             }
         }), 200
         
@@ -3,7 +3,7 @@ Priority Engine for Mandate Wizard
 
 Implements data-driven prioritization for entity updates based on:
 - User demand (demand_score, query_count)
-- Data freshness (last_updated_at)
+- Data freshness (last_updated_at, or the entities.updated_at column)
 - Entity importance (entity_type, relationships)
 - Update urgency (stale high-demand entities)
 
@@ -11,11 +11,19 @@ This engine determines which entities should be updated first to maximize
 value for users while optimizing resource usage.
 """
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from enum import Enum
+from dataclasses import dataclass, field
 import math
 
+import numpy as np
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
 
 class UpdatePriority(Enum):
     """Priority levels for entity updates"""
@@ -26,6 +34,43 @@ class UpdatePriority(Enum):
     DEFERRED = 5    # No demand, fresh data
 
 
+# Priority-score lower bounds for LOW, MEDIUM and HIGH; searchsorted over these
+# gives 0-3, and 5 minus that is the UpdatePriority value (DEFERRED..HIGH)
+_TIER_BOUNDS = np.array([20.0, 40.0, 70.0])
+_TIER_NAMES = np.array([p.name for p in sorted(UpdatePriority, key=lambda p: p.value)])
+
+
+def _epoch_seconds(values: List[Any]) -> np.ndarray:
+    """
+    Convert ISO strings / datetimes to POSIX seconds.
+    
+    Missing values become NaN; naive timestamps are treated as UTC, matching
+    the utcnow() comparison used by the per-entity scorers. Uses pandas' C
+    ISO-8601 parser for the whole column when available.
+    """
+    if pd is not None:
+        parsed = pd.to_datetime(
+            pd.Series([v or None for v in values], dtype=object),
+            utc=True, format='ISO8601'
+        )
+        stamps = parsed.dt.tz_convert(None).to_numpy().astype('datetime64[ns]')
+        out = stamps.astype(np.int64) / 1e9
+        out[np.isnat(stamps)] = np.nan
+        return out
+    
+    out = np.full(len(values), np.nan)
+    for i, value in enumerate(values):
+        if not value:
+            continue
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        out[i] = value.timestamp()
+    return out
+
+
+@dataclass(slots=True, frozen=True)
 class PriorityEngine:
     """
     Calculates update priority for entities based on demand and freshness.
@@ -36,48 +81,73 @@ class PriorityEngine:
                     (trending_weight * trending_score)
     
     Higher scores = higher priority for updates
+    
+    Args:
+        demand_weight: Weight for demand score (0-1)
+        freshness_weight: Weight for data freshness (0-1)
+        trending_weight: Weight for trending status (0-1)
+        stale_threshold_days: Days before data is considered stale
+        critical_demand_threshold: Demand score threshold for critical priority
     """
     
-    def __init__(self,
-                 demand_weight: float = 0.5,
-                 freshness_weight: float = 0.3,
-                 trending_weight: float = 0.2,
-                 stale_threshold_days: int = 30,
-                 critical_demand_threshold: int = 10):
+    demand_weight: float = 0.5
+    freshness_weight: float = 0.3
+    trending_weight: float = 0.2
+    stale_threshold_days: int = 30
+    critical_demand_threshold: int = 10
+    # Freshness points per day of age (50 at the stale threshold)
+    _inv_stale: float = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # Validate weights sum to 1.0
+        total_weight = self.demand_weight + self.freshness_weight + self.trending_weight
+        if not math.isclose(total_weight, 1.0, rel_tol=1e-5):
+            raise ValueError(f"Weights must sum to 1.0, got {total_weight}")
+        object.__setattr__(self, '_inv_stale', 50.0 / self.stale_threshold_days)
+    
+    def _precompute(self, entity: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Initialize priority engine with configurable weights.
+        Parse an entity's scoring inputs once.
         
-        Args:
-            demand_weight: Weight for demand score (0-1)
-            freshness_weight: Weight for data freshness (0-1)
-            trending_weight: Weight for trending status (0-1)
-            stale_threshold_days: Days before data is considered stale
-            critical_demand_threshold: Demand score threshold for critical priority
+        Returns:
+            Dict with demand_raw, age_days, days_since_query and query_count;
+            ages are None when the timestamp is missing
         """
-        self.demand_weight = demand_weight
-        self.freshness_weight = freshness_weight
-        self.trending_weight = trending_weight
-        self.stale_threshold_days = stale_threshold_days
-        self.critical_demand_threshold = critical_demand_threshold
+        now = datetime.now(timezone.utc)
         
-        # Validate weights sum to 1.0
-        total_weight = demand_weight + freshness_weight + trending_weight
-        if not math.isclose(total_weight, 1.0, rel_tol=1e-5):
-            raise ValueError(f"Weights must sum to 1.0, got {total_weight}")
+        def days_since(value) -> Optional[float]:
+            if not value:
+                return None
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return (now - value).total_seconds() / 86400
+        
+        return {
+            'demand_raw': entity.get('demand_score') or 0,
+            'age_days': days_since(entity.get('last_updated_at') or entity.get('updated_at')),
+            'days_since_query': days_since(entity.get('last_queried_at')),
+            'query_count': entity.get('query_count') or 0,
+        }
     
-    def calculate_priority_score(self, entity: Dict[str, Any]) -> float:
+    def calculate_priority_score(self,
+                                 entity: Dict[str, Any],
+                                 ctx: Optional[Dict[str, Any]] = None) -> float:
         """
         Calculate priority score for an entity.
         
         Args:
             entity: Entity dict with demand_score, last_updated_at, etc.
+            ctx: Result of _precompute(entity), if already available
             
         Returns:
             Priority score (0-100, higher = more urgent)
         """
-        demand_score = self._calculate_demand_score(entity)
-        freshness_score = self._calculate_freshness_score(entity)
-        trending_score = self._calculate_trending_score(entity)
+        ctx = ctx or self._precompute(entity)
+        demand_score = self._calculate_demand_score(ctx)
+        freshness_score = self._calculate_freshness_score(ctx)
+        trending_score = self._calculate_trending_score(ctx)
         
         priority_score = (
             self.demand_weight * demand_score +
@@ -87,13 +157,13 @@ class PriorityEngine:
         
         return round(priority_score, 2)
     
-    def _calculate_demand_score(self, entity: Dict[str, Any]) -> float:
+    def _calculate_demand_score(self, ctx: Dict[str, Any]) -> float:
         """
         Calculate demand component (0-100).
         
         Uses logarithmic scaling to prevent extreme values from dominating.
         """
-        raw_demand = entity.get('demand_score', 0)
+        raw_demand = ctx['demand_raw']
         
         if raw_demand == 0:
             return 0.0
@@ -104,59 +174,35 @@ class PriorityEngine:
         
         return min(score, 100.0)
     
-    def _calculate_freshness_score(self, entity: Dict[str, Any]) -> float:
+    def _calculate_freshness_score(self, ctx: Dict[str, Any]) -> float:
         """
         Calculate freshness component (0-100).
         
         Older data = higher score (more urgent to update).
         """
-        last_updated = entity.get('last_updated_at')
+        age_days = ctx['age_days']
         
-        if not last_updated:
+        if age_days is None:
             # No update timestamp = assume very old
             return 100.0
         
-        # Parse timestamp
-        if isinstance(last_updated, str):
-            last_updated = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-        
-        # Calculate age in days
-        now = datetime.utcnow()
-        if last_updated.tzinfo:
-            from datetime import timezone
-            now = datetime.now(timezone.utc)
-        
-        age_days = (now - last_updated).total_seconds() / 86400
-        
         # Scoring: 0 days = 0, 30 days = 50, 60+ days = 100
-        score = min((age_days / self.stale_threshold_days) * 50, 100.0)
+        score = min(age_days * self._inv_stale, 100.0)
         
         return score
     
-    def _calculate_trending_score(self, entity: Dict[str, Any]) -> float:
+    def _calculate_trending_score(self, ctx: Dict[str, Any]) -> float:
         """
         Calculate trending component (0-100).
         
         Entities with recent query activity score higher.
         """
-        last_queried = entity.get('last_queried_at')
-        query_count = entity.get('query_count', 0)
+        days_since_query = ctx['days_since_query']
         
-        if not last_queried or query_count == 0:
+        if days_since_query is None or ctx['query_count'] == 0:
             return 0.0
         
-        # Parse timestamp
-        if isinstance(last_queried, str):
-            last_queried = datetime.fromisoformat(last_queried.replace('Z', '+00:00'))
-        
-        # Calculate recency (queries in last 7 days are trending)
-        now = datetime.utcnow()
-        if last_queried.tzinfo:
-            from datetime import timezone
-            now = datetime.now(timezone.utc)
-        
-        days_since_query = (now - last_queried).total_seconds() / 86400
-        
+        # Recency (queries in last 7 days are trending)
         if days_since_query <= 1:
             return 100.0  # Queried today = very trending
         elif days_since_query <= 7:
@@ -166,37 +212,33 @@ class PriorityEngine:
         else:
             return 0.0    # Old queries = not trending
     
-    def classify_priority(self, entity: Dict[str, Any]) -> UpdatePriority:
+    def classify_priority(self,
+                          entity: Dict[str, Any],
+                          ctx: Optional[Dict[str, Any]] = None,
+                          priority_score: Optional[float] = None) -> UpdatePriority:
         """
         Classify entity into priority tier.
         
         Args:
             entity: Entity dict with demand and freshness data
+            ctx: Result of _precompute(entity), if already available
+            priority_score: Result of calculate_priority_score(entity), if already available
             
         Returns:
             UpdatePriority enum value
         """
-        demand_score = entity.get('demand_score', 0)
-        priority_score = self.calculate_priority_score(entity)
+        ctx = ctx or self._precompute(entity)
         
         # Check for critical: high demand + stale data
-        if demand_score >= self.critical_demand_threshold:
-            last_updated = entity.get('last_updated_at')
-            if last_updated:
-                if isinstance(last_updated, str):
-                    last_updated = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                
-                now = datetime.utcnow()
-                if last_updated.tzinfo:
-                    from datetime import timezone
-                    now = datetime.now(timezone.utc)
-                
-                age_days = (now - last_updated).total_seconds() / 86400
-                
-                if age_days >= self.stale_threshold_days:
-                    return UpdatePriority.CRITICAL
+        age_days = ctx['age_days']
+        if (ctx['demand_raw'] >= self.critical_demand_threshold
+                and age_days is not None
+                and age_days >= self.stale_threshold_days):
+            return UpdatePriority.CRITICAL
         
         # Classify by priority score
+        if priority_score is None:
+            priority_score = self.calculate_priority_score(entity, ctx)
         if priority_score >= 70:
             return UpdatePriority.HIGH
         elif priority_score >= 40:
@@ -206,25 +248,110 @@ class PriorityEngine:
         else:
             return UpdatePriority.DEFERRED
     
-    def rank_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _score_entities(self, entities: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized equivalent of calculate_priority_score + classify_priority.
+        
+        Pulls the scoring inputs into column arrays once and computes every
+        component in a single NumPy pass.
+        
+        Returns:
+            (priority scores, priority tier names), aligned with entities
+        """
+        n = len(entities)
+        demand = np.fromiter((e.get('demand_score') or 0 for e in entities), dtype=np.float64, count=n)
+        query_count = np.fromiter((e.get('query_count') or 0 for e in entities), dtype=np.float64, count=n)
+        
+        now_ts = datetime.now(timezone.utc).timestamp()
+        age_days = (now_ts - _epoch_seconds([e.get('last_updated_at') or e.get('updated_at') for e in entities])) / 86400
+        days_since_query = (now_ts - _epoch_seconds([e.get('last_queried_at') for e in entities])) / 86400
+        
+        demand_score = np.minimum(np.log10(demand + 1) * 20, 100.0)
+        
+        # No update timestamp (NaN age) = assume very old
+        freshness_score = np.where(
+            np.isnan(age_days),
+            100.0,
+            np.minimum(age_days * self._inv_stale, 100.0)
+        )
+        
+        # NaN comparisons are False, so entities never queried fall to 0
+        trending_score = np.select(
+            [days_since_query <= 1, days_since_query <= 7, days_since_query <= 30],
+            [100.0, 70.0, 30.0],
+            default=0.0
+        )
+        trending_score[query_count == 0] = 0.0
+        
+        priority = np.round(
+            self.demand_weight * demand_score +
+            self.freshness_weight * freshness_score +
+            self.trending_weight * trending_score,
+            2
+        )
+        
+        # Bucket scores into tiers, then override stale high-demand as CRITICAL
+        tier_value = 5 - np.searchsorted(_TIER_BOUNDS, priority, side='right')
+        is_critical = (demand >= self.critical_demand_threshold) & (age_days >= self.stale_threshold_days)
+        tier_value = np.where(is_critical, UpdatePriority.CRITICAL.value, tier_value)
+        
+        return priority, _TIER_NAMES[tier_value - 1]
+    
+    def _rank(self,
+              entities: List[Dict[str, Any]],
+              top_k: Optional[int] = None,
+              tiers: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Score entities and return them in descending priority order.
+        
+        Only entities in `tiers` (if given) are considered. With `top_k`, the
+        top-K are selected with an O(n) partition and only those are sorted;
+        ties at the cut-off keep input order, exactly like a full stable sort.
+        Only the returned entities get priority_score/priority_tier added.
+        """
+        if not entities or (top_k is not None and top_k <= 0):
+            return []
+        
+        scores, tier_names = self._score_entities(entities)
+        
+        if tiers is None:
+            candidates = np.arange(len(entities))
+        else:
+            candidates = np.flatnonzero(np.isin(tier_names, tiers))
+        
+        if top_k is not None and top_k < len(candidates):
+            cand_scores = scores[candidates]
+            kth = -np.partition(-cand_scores, top_k - 1)[top_k - 1]
+            above = candidates[cand_scores > kth]
+            ties = candidates[cand_scores == kth][:top_k - len(above)]
+            candidates = np.concatenate([above, ties])
+        
+        # Descending score, input order among equal scores
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        
+        ranked = []
+        for i in order.tolist():
+            entity = entities[i]
+            entity['priority_score'] = float(scores[i])
+            entity['priority_tier'] = str(tier_names[i])
+            ranked.append(entity)
+        
+        return ranked
+    
+    def rank_entities(self,
+                      entities: List[Dict[str, Any]],
+                      top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Rank entities by update priority.
         
         Args:
             entities: List of entity dicts
+            top_k: Only select and sort the top K entities (optional)
             
         Returns:
             Sorted list with priority_score and priority_tier added
         """
-        # Calculate scores
-        for entity in entities:
-            entity['priority_score'] = self.calculate_priority_score(entity)
-            entity['priority_tier'] = self.classify_priority(entity).name
-        
-        # Sort by priority score (descending)
-        ranked = sorted(entities, key=lambda e: e['priority_score'], reverse=True)
-        
-        return ranked
+        return self._rank(entities, top_k=top_k)
     
     def get_update_batch(self, 
                         entities: List[Dict[str, Any]], 
@@ -241,18 +368,13 @@ class PriorityEngine:
         Returns:
             List of entities to update, sorted by priority
         """
-        # Rank all entities
-        ranked = self.rank_entities(entities)
-        
         # Filter by minimum priority if specified
+        tiers = None
         if min_priority:
-            ranked = [
-                e for e in ranked 
-                if UpdatePriority[e['priority_tier']].value <= min_priority.value
-            ]
+            tiers = [p.name for p in UpdatePriority if p.value <= min_priority.value]
         
-        # Return top N
-        return ranked[:batch_size]
+        # Return top N without sorting the rest
+        return self._rank(entities, top_k=batch_size, tiers=tiers)
     
     def get_critical_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -264,14 +386,7 @@ class PriorityEngine:
         Returns:
             List of critical entities
         """
-        ranked = self.rank_entities(entities)
-        
-        critical = [
-            e for e in ranked 
-            if e['priority_tier'] == UpdatePriority.CRITICAL.name
-        ]
-        
-        return critical
+        return self._rank(entities, tiers=[UpdatePriority.CRITICAL.name])
     
     def generate_update_schedule(self, 
                                  entities: List[Dict[str, Any]], 
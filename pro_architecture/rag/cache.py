@@ -0,0 +1,100 @@
+from __future__ import annotations
+import threading, time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ttl_sec."""
+
+    def __init__(self, max_items: int = 2048, ttl_sec: float = 300):
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None or now - hit[0] > self.ttl_sec:
+                if hit is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return hit[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+class SemanticCache:
+    """
+    Answers keyed by question embedding, for paraphrased repeats.
+
+    Vectors live in one contiguous int8 matrix (a ring buffer of max_items
+    rows) with a float32 scale per row, a quarter of the float32 footprint, so
+    a lookup is a single matrix @ vec product. Each entry also keeps
+    the doc IDs its answer was grounded on, so callers can check that a fresh
+    retrieval still overlaps before trusting a hit.
+    """
+
+    def __init__(self, max_items: int = 1024, ttl_sec: float = 300, threshold: float = 0.95):
+        import numpy as np
+        self._np = np
+        self.max_items = max_items
+        self.ttl_sec = ttl_sec
+        self.threshold = threshold
+        self._codes = None  # allocated on first add, once the dimension is known
+        self._scales = np.zeros(max_items, dtype=np.float32)
+        self._ts = np.zeros(max_items)
+        self._items: list = [None] * max_items  # (value, doc_ids)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _normalize(self, vec):
+        v = self._np.asarray(vec, dtype=self._np.float32)
+        n = self._np.linalg.norm(v)
+        return v / n if n else v
+
+    def lookup(self, vec) -> Optional[tuple]:
+        """Return (value, doc_ids) of the most similar live entry above threshold."""
+        v = self._normalize(vec)
+        with self._lock:
+            if self._codes is None:
+                return None
+            # Dequantize on the fly: row i is codes[i] * scales[i]
+            sims = (self._codes @ v) * self._scales
+            sims[time.time() - self._ts > self.ttl_sec] = -1.0  # expired or never filled
+            i = int(sims.argmax())
+            if sims[i] < self.threshold:
+                return None
+            return self._items[i]
+
+    def add(self, vec, value: Any, doc_ids: set) -> None:
+        v = self._normalize(vec)
+        with self._lock:
+            if self._codes is None:
+                self._codes = self._np.zeros((self.max_items, v.shape[0]), dtype=self._np.int8)
+            slot = self._next
+            # Symmetric per-vector int8: cosine error ~1e-3, far below the threshold margin
+            scale = float(self._np.abs(v).max()) / 127 or 1.0
+            self._codes[slot] = self._np.round(v / scale)
+            self._scales[slot] = scale
+            self._ts[slot] = time.time()
+            self._items[slot] = (value, doc_ids)
+            self._next = (slot + 1) % self.max_items
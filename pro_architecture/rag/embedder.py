@@ -1,18 +1,62 @@
 from __future__ import annotations
-import hashlib, time
+import hashlib, threading, time
+from collections import OrderedDict
 from typing import List, Dict, Tuple
+import numpy as np
 from config import S
 
+# Persistent second-level cache so repeated texts survive restarts / cron runs
+class SQLiteEmbedCache:
+    def __init__(self, path: str, ttl: int):
+        import sqlite3
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # concurrent readers across processes
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache(k TEXT PRIMARY KEY, ts REAL, vec BLOB)")
+        self.conn.execute("DELETE FROM cache WHERE ts < ?", (time.time() - ttl,))
+        self.conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, list[float]]:
+        found: Dict[str, list[float]] = {}
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for b in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+                chunk = keys[b:b + 500]
+                rows = self.conn.execute(
+                    f"SELECT k, vec FROM cache WHERE ts >= ? AND k IN ({','.join('?' * len(chunk))})",
+                    (cutoff, *chunk),
+                ).fetchall()
+                for k, vec in rows:
+                    found[k] = np.frombuffer(vec, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items: List[Tuple[str, float, list[float]]]):
+        rows = [(k, ts, np.asarray(vec, dtype=np.float32).tobytes()) for k, ts, vec in items]
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO cache(k, ts, vec) VALUES (?, ?, ?)", rows)
+            self.conn.commit()
+
 # Hosted (OpenAI) embedder
 class OpenAIEmbedder:
     def __init__(self):
-        from openai import OpenAI
-        self.client = OpenAI(api_key=S.OPENAI_API_KEY)
+        from infra.openai_client import get_client
+        self.client = get_client()
         self.model = S.EMBEDDING_MODEL
-        self.cache: Dict[str, Tuple[float, list[float]]] = {}
+        # Hash state with "model|" already absorbed; copied per text
+        self._key_base = hashlib.blake2b((self.model + "|").encode("utf-8"), digest_size=16)
+        # LRU order: least recently used first; vectors held as float16 bytes
+        # (a quarter of a list[float]'s footprint, ranking is unaffected)
+        self.cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()  # cache is shared by request/pipeline threads
+        # RAM -> SQLite -> API
+        self.db = SQLiteEmbedCache(S.EMBED_CACHE_DB, S.EMBED_CACHE_DB_TTL) if S.EMBED_CACHE_DB else None
 
     def _key(self, text: str) -> str:
-        return hashlib.sha1((self.model + "|" + text).encode("utf-8")).hexdigest()
+        # Non-cryptographic use: BLAKE2b is faster than SHA-1 and needs no concat
+        h = self._key_base.copy()
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()
 
     def _cached(self, k: str, now: float):
         hit = self.cache.get(k)
@@ -20,34 +64,72 @@ class OpenAIEmbedder:
         ts, vec = hit
         if now - ts > S.EMBED_CACHE_TTL:
             self.cache.pop(k, None); return None
-        return vec
+        self.cache.move_to_end(k)
+        return np.frombuffer(vec, dtype=np.float16).astype(np.float32).tolist()
+
+    def _store(self, k: str, now: float, vec: list[float]):
+        self.cache[k] = (now, np.asarray(vec, dtype=np.float16).tobytes())
 
     def _evict(self):
-        if len(self.cache) <= S.EMBED_CACHE_MAX: return
-        items = sorted(self.cache.items(), key=lambda kv: kv[1][0]); cut = max(1, len(items)//10)
-        for k,_ in items[:cut]: self.cache.pop(k, None)
+        while len(self.cache) > S.EMBED_CACHE_MAX:
+            self.cache.popitem(last=False)
 
     def embed(self, texts: List[str]) -> List[List[float]]:
-        out, now = [], time.time()
-        for t in texts:
-            k = self._key(t[:8000])
-            vec = self._cached(k, now)
-            if vec is None:
-                r = self.client.embeddings.create(model=self.model, input=t[:8000])
-                vec = r.data[0].embedding
-                self.cache[k] = (now, vec); self._evict()
-            out.append(vec)
+        out: List[list[float]] = [None] * len(texts)
+        misses: List[Tuple[int, str, str]] = []  # (index, truncated text, cache key)
+        now = time.time()
+        # One slice (a no-op for short texts) and one encode per text; the
+        # truncated str is kept for the API call on a miss
+        keyed = [(tt, self._key(tt)) for tt in (t if len(t) <= 8000 else t[:8000] for t in texts)]
+        with self._lock:
+            for i, (tt, k) in enumerate(keyed):
+                vec = self._cached(k, now)
+                if vec is None:
+                    misses.append((i, tt, k))
+                else:
+                    out[i] = vec
+        if misses and self.db:
+            found = self.db.get_many([k for _, _, k in misses])
+            if found:
+                with self._lock:
+                    for i, _, k in misses:
+                        if k in found:
+                            out[i] = found[k]
+                            self._store(k, now, found[k])
+                misses = [m for m in misses if m[2] not in found]
+        if misses:
+            # One request per EMBED_BATCH_SIZE misses; the API returns data in input order
+            for b in range(0, len(misses), S.EMBED_BATCH_SIZE):
+                batch = misses[b:b + S.EMBED_BATCH_SIZE]
+                r = self.client.embeddings.create(model=self.model, input=[m[1] for m in batch])
+                with self._lock:
+                    for (i, _, k), d in zip(batch, r.data):
+                        out[i] = d.embedding
+                        self._store(k, now, d.embedding)
+                if self.db:
+                    self.db.put_many([(k, now, d.embedding) for (_, _, k), d in zip(batch, r.data)])
+        with self._lock:
+            self._evict()
         return out
 
     def embed_one(self, text: str) -> List[float]:
+        # Hot path for query embeddings: answer warm hits without the batch bookkeeping
+        k = self._key(text if len(text) <= 8000 else text[:8000])
+        with self._lock:
+            vec = self._cached(k, time.time())
+        if vec is not None:
+            return vec
         return self.embed([text])[0]
 
 _embedder = None
+_embedder_lock = threading.Lock()
 def get_embedder():
     global _embedder
     if _embedder is None:
-        if S.EMBEDDER == "openai":
-            _embedder = OpenAIEmbedder()
-        else:
-            raise ValueError(f"Unknown EMBEDDER: {S.EMBEDDER}")
+        with _embedder_lock:
+            if _embedder is None:
+                if S.EMBEDDER == "openai":
+                    _embedder = OpenAIEmbedder()
+                else:
+                    raise ValueError(f"Unknown EMBEDDER: {S.EMBEDDER}")
     return _embedder
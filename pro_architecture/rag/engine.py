@@ -1,42 +1,106 @@
 from __future__ import annotations
-import json, time
-from typing import Any, Dict, List
+import copy, functools, hashlib, heapq, json, re, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple, Union
 from config import S
 from rag.intent import classify
 from rag.retrievers.pinecone_retriever import PineconeRetriever
 from rag.graph.dao import Neo4jDAO
+from infra.neo4j_client import warm_up as warm_up_neo4j
 from rag.ranking.reranker import get_reranker
 from rag.embedder import get_embedder
+from infra.openai_client import get_client
 from rag.fusion import dedup_keep_best, mmr
-from rag.prompts import SYSTEM, USER_TEMPLATE
+from rag.prompts import SYSTEM_PROMPT, USER_TEMPLATE
+from rag.cache import TTLCache, SemanticCache, jaccard
+from demand_signals import DemandSignalTracker
+from web_search_fallback import WebSearchFallback
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+
+    def _dump_snippets(rows: List[Dict[str, Any]]) -> str:
+        # One C-level call for the whole list; non-str values (dates) via str
+        return orjson.dumps(rows, default=str).decode("utf-8")
+except ImportError:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+    def _dump_snippets(rows: List[Dict[str, Any]]) -> str:
+        return json.dumps(rows, default=str)
+
+# Fields every synthesized answer carries; falsy model values fall back to these
+_ANSWER_DEFAULTS = {"citations": [], "sources": [], "last_updated": None, "data_freshness": "unknown"}
+
+# Shared by all requests in the process; Pinecone's client is thread-safe
+_query_pool = ThreadPoolExecutor(max_workers=S.RETRIEVE_WORKERS, thread_name_prefix="retrieve")
+
+_POOR_ANSWERS_LOG = Path("/tmp/mandate_wizard_logs") / "poor_answers.jsonl"
+_POOR_ANSWERS_LOG.parent.mkdir(parents=True, exist_ok=True)
+
+# Final answers by normalized question; repeats skip retrieval and the LLM call
+_answer_cache = TTLCache(max_items=S.ANSWER_CACHE_MAX, ttl_sec=S.ANSWER_CACHE_TTL)
+# Paraphrases: similar question embedding *and* overlapping retrieved docs
+_semantic_cache = SemanticCache(
+    max_items=S.SEMANTIC_CACHE_MAX, ttl_sec=S.ANSWER_CACHE_TTL, threshold=S.SEMANTIC_CACHE_SIM
+)
+_WS_RE = re.compile(r"\s+")
+
+def _question_key(question: str) -> bytes:
+    return hashlib.blake2b(_WS_RE.sub(" ", question.strip().lower()).encode("utf-8"), digest_size=16).digest()
+
+def _hit_score(hit: Dict[str, Any]) -> float:
+    return hit.get("score", 0)
+
+@functools.lru_cache(maxsize=1024)
+def _multi_query_cached(q: str, n: int) -> Tuple[str, ...]:
+    # Lightweight MQE: simple rewrites to trade recall/latency without an LLM call.
+    variants = [q]
+    if n >= 1:
+        variants.append(q + " Hollywood TV and film industry context")
+    if n >= 2:
+        variants.append(q.replace("mandate", "commissioning mandate"))
+    return tuple(dict.fromkeys(variants))[: 1 + n]
 
 class Engine:
     def __init__(self):
         self.retriever = PineconeRetriever()
         self.graph = Neo4jDAO()
+        # Handshake overlaps the first request's embedding and vector search
+        warm_up_neo4j()
         self.embedder = get_embedder()
         self.reranker = get_reranker()
+        self.llm = get_client()  # process-wide keep-alive pool
+        self.demand_tracker = DemandSignalTracker()
+        self.web_fallback = WebSearchFallback()
 
     def _multi_query(self, q: str) -> List[str]:
-        # Lightweight MQE: simple rewrites to trade recall/latency without an LLM call.
-        variants = [q]
-        if S.M_Q_EXPANSIONS >= 1:
-            variants.append(q + " Hollywood TV and film industry context")
-        if S.M_Q_EXPANSIONS >= 2:
-            variants.append(q.replace("mandate", "commissioning mandate"))
-        return list(dict.fromkeys(variants))[: 1 + S.M_Q_EXPANSIONS]
-
-    def retrieve(self, question: str) -> List[Dict[str, Any]]:
+        return list(_multi_query_cached(q, S.M_Q_EXPANSIONS))
+
+    def retrieve(self, question: str, probe_hits: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         qs = self._multi_query(question)
-        all_hits: List[Dict[str, Any]] = []
-        for subq in qs:
-            hits = self.retriever.query(subq, top_k=S.TOP_K_VECTOR)
+        if probe_hits is None:
+            probe_hits = self.retriever.query_vector(self.embedder.embed_one(qs[0]), top_k=S.TOP_K_VECTOR)
+        # Clear match on the unmodified question: skip expansion and rerank
+        if (len(probe_hits) >= S.RERANK_RETURN
+                and probe_hits[0].get("score", 0) >= S.EARLY_EXIT_SCORE):
+            return probe_hits[: S.RERANK_RETURN]
+        # Hits for the unmodified question (qs[0]) are already fetched
+        qs = qs[1:]
+        all_hits: List[Dict[str, Any]] = list(probe_hits)
+        # One embeddings request for all variants, then the Pinecone queries in parallel
+        vecs = self.embedder.embed(qs) if qs else []
+        for hits in _query_pool.map(lambda v: self.retriever.query_vector(v, top_k=S.TOP_K_VECTOR), vecs):
             all_hits.extend(hits)
         merged = dedup_keep_best(all_hits, key="id")
 
         # Rerank
         if self.reranker and merged:
-            top = merged[: S.RERANK_TOP_K]
+            # Best-scored candidates across all variants: O(N log k), not a full sort
+            top = heapq.nlargest(S.RERANK_TOP_K, merged, key=_hit_score)
             texts = [h.get("metadata", {}).get("text", "") for h in top]
             ranks = self.reranker.rerank(question, texts, top_n=min(S.RERANK_RETURN, len(texts)))
             ranked = [top[r["index"]] for r in ranks]
@@ -44,26 +108,43 @@ class Engine:
 
         # MMR fallback if enabled
         if S.USE_MMR:
-            return merged[: S.RERANK_RETURN]
-        return merged[: S.RERANK_RETURN]
+            return mmr(merged, top_k=S.RERANK_RETURN)
+        return heapq.nlargest(S.RERANK_RETURN, merged, key=_hit_score)
+
+    def retrieve_batch(self, questions: List[str]) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        retrieve() for several questions: one embeddings request covers all of
+        them and their first Pinecone queries run in parallel. Results line up
+        with questions; a question that fails holds its exception instead of
+        hits, so one bad query doesn't sink the rest.
+        """
+        if not questions:
+            return []
+        # The unmodified question is always the first variant
+        vecs = self.embedder.embed(list(questions))
+        probes = [_query_pool.submit(self.retriever.query_vector, v, top_k=S.TOP_K_VECTOR) for v in vecs]
+        results: List[Union[List[Dict[str, Any]], Exception]] = []
+        for question, probe in zip(questions, probes):
+            try:
+                results.append(self.retrieve(question, probe_hits=probe.result()))
+            except Exception as e:
+                results.append(e)
+        return results
 
     def enrich_entities(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        out = []
-        for d in docs[:5]:
-            meta = d.get("metadata") or {}
-            pid = meta.get("person_entity_id")
-            if pid:
-                p = self.graph.get_person_by_id(pid)
-                if p:
-                    out.append({"type": "neo4j_person", "entity_id": pid, "data": p})
-        return out
+        pids = [(d.get("metadata") or {}).get("person_entity_id") for d in docs[:5]]
+        pids = [pid for pid in pids if pid]
+        if not pids:
+            return []
+        # One UNWIND query instead of a round-trip per person
+        persons = self.graph.get_persons_by_ids(pids)
+        return [
+            {"type": "neo4j_person", "entity_id": pid, "data": persons[pid]}
+            for pid in pids if pid in persons
+        ]
 
-    def synthesize(self, question: str, docs: List[Dict[str, Any]], entities: List[Dict[str, Any]]) -> Dict[str, Any]:
-        from openai import OpenAI
-        client = OpenAI(
-            api_key=S.OPENAI_API_KEY,
-            base_url='https://api.openai.com/v1'
-        )
+    def _prompt(self, question: str, docs: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+        """Build the synthesis prompt and the doc citations for it."""
         # Keep snippets small to preserve tokens, but include dates and URLs
         rows = []
         citations = []
@@ -79,38 +160,83 @@ class Engine:
             }
             rows.append(snippet)
             citations.append({"type": "doc", "id": d.get("id")})
-        for e in entities:
-            citations.append({"type": "neo4j", "id": e.get("entity_id")})
-        prompt = USER_TEMPLATE.format(question=question, snippets="\n".join(json.dumps(r) for r in rows))
-        chat = client.chat.completions.create(
+        prompt = USER_TEMPLATE.format(question=question, snippets=_dump_snippets(rows))
+        return prompt, citations
+
+    def _stream_completion(self, prompt: str) -> Iterator[str]:
+        """Yield the completion text as it streams from the LLM."""
+        # Static SYSTEM_PROMPT first, per-request content last: the shared
+        # prefix stays byte-identical so OpenAI's prompt cache can reuse it
+        extra = {"prompt_cache_key": S.PROMPT_CACHE_KEY} if S.PROMPT_CACHE_KEY else None
+        chat = self.llm.chat.completions.create(
             model=S.COMPLETIONS_MODEL,
             temperature=0.2,
             max_tokens=S.MAX_TOKENS,
-            messages=[{"role":"system","content":SYSTEM},{"role":"user","content":prompt}]
+            stream=True,
+            messages=[{"role":"system","content":SYSTEM_PROMPT},{"role":"user","content":prompt}],
+            extra_body=extra,
         )
-        txt = chat.choices[0].message.content
+        for chunk in chat:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _assemble(self, txt: str, citations: List[Dict[str, Any]]) -> Dict[str, Any]:
         try:
-            data = json.loads(txt)
-        except Exception:
+            data = _loads(txt)
+        except _JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
             # fallback wrapper
-            data = {"final_answer": txt, "citations": citations, "entities": [], "sources": [], "last_updated": None}
-        # ensure required fields
-        if not data.get("citations"):
+            data = {"final_answer": txt, "entities": []}
+        # ensure required fields (same as filling each falsy key)
+        data = {**data, **{k: v for k, v in _ANSWER_DEFAULTS.items() if not data.get(k)}}
+        if not data["citations"]:
             data["citations"] = citations
-        if not data.get("sources"):
-            data["sources"] = []
-        if not data.get("last_updated"):
-            data["last_updated"] = None
-        if not data.get("data_freshness"):
-            data["data_freshness"] = "unknown"
         return data
 
+    def synthesize(self, question: str, docs: List[Dict[str, Any]], entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+        prompt, citations = self._prompt(question, docs)
+        txt = "".join(self._stream_completion(prompt))
+        citations += [{"type": "neo4j", "id": e.get("entity_id")} for e in entities]
+        return self._assemble(txt, citations)
+
     def answer(self, question: str, user_email: str = None) -> Dict[str, Any]:
+        for event in self.answer_stream(question, user_email):
+            pass
+        return event
+
+    def answer_stream(self, question: str, user_email: str = None) -> Iterator[Union[str, Dict[str, Any]]]:
+        """Yield the answer text (raw LLM output) as it streams, then the final answer dict."""
         t0 = time.time()
+        key = _question_key(question) if S.ANSWER_CACHE_ENABLED else None
+        if key is not None:
+            cached = _answer_cache.get(key)
+            if cached is not None:
+                yield self._cached_answer(question, cached, "hit", t0, user_email)
+                return
+        
+        probe_hits = qvec = None
+        if S.SEMANTIC_CACHE_ENABLED:
+            qvec = self.embedder.embed_one(question)
+            probe_hits = self.retriever.query_vector(qvec, top_k=S.TOP_K_VECTOR)
+            similar = _semantic_cache.lookup(qvec)
+            # Only trust the paraphrase if today's retrieval still lands on the same docs
+            if similar is not None and jaccard({h["id"] for h in probe_hits}, similar[1]) >= S.SEMANTIC_CACHE_OVERLAP:
+                yield self._cached_answer(question, similar[0], "semantic_hit", t0, user_email)
+                return
+        
         intent = classify(question)
-        docs = self.retrieve(question)
-        entities = self.enrich_entities(docs)
-        out = self.synthesize(question, docs, entities)
+        docs = self.retrieve(question, probe_hits=probe_hits)
+        # Enrichment only feeds citations, so it runs while the LLM generates
+        entities_future = _query_pool.submit(self.enrich_entities, docs)
+        prompt, citations = self._prompt(question, docs)
+        parts: List[str] = []
+        for delta in self._stream_completion(prompt):
+            parts.append(delta)
+            yield delta
+        entities = entities_future.result()
+        citations += [{"type": "neo4j", "id": e.get("entity_id")} for e in entities]
+        out = self._assemble("".join(parts), citations)
         
         # Add metadata
         out["meta"] = {
@@ -124,32 +250,44 @@ class Engine:
             out["follow_up_questions"] = []
         
         # Track demand signals (what users ask for that we don't have)
-        from demand_signals import DemandSignalTracker
-        tracker = DemandSignalTracker()
-        tracker.log_demand(question, out, user_email)
+        self.demand_tracker.log_demand(question, out, user_email)
         
         # Web search fallback for low-quality results
-        from web_search_fallback import WebSearchFallback
-        fallback = WebSearchFallback()
-        if fallback.should_trigger(out):
-            out = fallback.search_and_supplement(question, out)
+        if self.web_fallback.should_trigger(out):
+            out = self.web_fallback.search_and_supplement(question, out)
         
         # Track potentially poor answers
         answer_length = len(out.get("final_answer", ""))
         if answer_length < 50 or len(entities) == 0:
             self._log_poor_answer(question, out, docs)
         
+        if key is not None:
+            out.setdefault("meta", {})["cache"] = "miss"
+            _answer_cache.set(key, copy.deepcopy(out))
+        if qvec is not None:
+            _semantic_cache.add(qvec, copy.deepcopy(out), {h["id"] for h in probe_hits})
+        
+        yield out
+    
+    def _cached_answer(self, question: str, cached: Dict[str, Any], kind: str, t0: float, user_email: str = None) -> Dict[str, Any]:
+        # Copy so callers can't mutate the cached answer
+        out = copy.deepcopy(cached)
+        out.setdefault("meta", {}).update({
+            "latency_ms": int((time.time() - t0)*1000),
+            "cache": kind,
+            "cache_hits": _answer_cache.hits,
+            "cache_misses": _answer_cache.misses,
+        })
+        # Demand is still counted per ask
+        self.demand_tracker.log_demand(question, out, user_email)
         return out
     
     def _log_poor_answer(self, question: str, response: Dict[str, Any], docs: List[Dict[str, Any]]):
         """Log questions that may have poor answers for later review."""
-        import json
-        from pathlib import Path
         from datetime import datetime
+        from logging_service import get_background_jsonl_writer
         
-        log_dir = Path("/tmp/mandate_wizard_logs")
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_file = log_dir / "poor_answers.jsonl"
+        log_file = _POOR_ANSWERS_LOG
         
         entry = {
             "timestamp": datetime.utcnow().isoformat(),
@@ -168,5 +306,5 @@ class Engine:
         if len(response.get("entities", [])) == 0:
             entry["reason"].append("no_entities")
         
-        with open(log_file, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        # Queued; a background thread batches the appends off the request path
+        get_background_jsonl_writer(log_file).write(entry)
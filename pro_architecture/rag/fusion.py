@@ -1,23 +1,42 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Callable
+import numpy as np
 
 def dedup_keep_best(items: List[Dict[str, Any]], key: str = "id") -> List[Dict[str, Any]]:
     """Deduplicate items by key, keeping the one with the highest score."""
     seen: Dict[str, Dict[str, Any]] = {}
+    best: Dict[str, float] = {}  # score of seen[k], so each item is read once
     for item in items:
         k = item.get(key)
         if not k:
             continue
-        if k not in seen or item.get("score", 0) > seen[k].get("score", 0):
+        s = item.get("score", 0)
+        cur = best.get(k)
+        if cur is None or s > cur:
+            best[k] = s
             seen[k] = item
     return list(seen.values())
 
+def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k scores, descending; ties keep input order like sorted()."""
+    if top_k < len(scores):
+        idx = np.argpartition(-scores, top_k - 1)[:top_k]
+        kth = scores[idx].min()
+        # argpartition picks arbitrary members of a tie at the cut-off
+        above = np.flatnonzero(scores > kth)
+        idx = np.concatenate([above, np.flatnonzero(scores == kth)[:top_k - len(above)]])
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.lexsort((idx, -scores[idx]))]
+
 def mmr(items: List[Dict[str, Any]], lambda_param: float = 0.5, top_k: int = 10) -> List[Dict[str, Any]]:
     """
     Maximal Marginal Relevance (MMR) for diversity.
     This is a simplified version that just returns the top-k by score.
     A full implementation would require access to vectors for similarity calculation.
     """
-    # Sort by score descending
-    sorted_items = sorted(items, key=lambda x: x.get("score", 0), reverse=True)
-    return sorted_items[:top_k]
+    if not items or top_k <= 0:
+        return []
+    # float64 like the Python floats sorted() compared, so near-equal scores don't collapse into ties
+    scores = np.fromiter((x.get("score", 0) for x in items), dtype=np.float64, count=len(items))
+    return [items[i] for i in _top_k_indices(scores, top_k)]
@@ -1,11 +1,19 @@
 from __future__ import annotations
-from typing import Optional, Dict, Any
-from infra.neo4j_client import get_driver
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List
+from neo4j import READ_ACCESS, Session
+from infra.neo4j_client import get_driver, session as neo4j_session
 
 class Neo4jDAO:
     def __init__(self):
         self.driver = get_driver()
 
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """Pooled read session; every lookup here is read-only."""
+        with neo4j_session(access_mode=READ_ACCESS) as session:
+            yield session
+
     def get_person_by_id(self, entity_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a person node by entity_id."""
         query = """
@@ -13,13 +21,33 @@ class Neo4jDAO:
         RETURN p.name AS name, p.title AS title, p.company AS company, p.region AS region
         LIMIT 1
         """
-        with self.driver.session() as session:
+        with self._session() as session:
             result = session.run(query, entity_id=entity_id)
             record = result.single()
             if record:
                 return dict(record)
         return None
 
+    def get_persons_by_ids(self, entity_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Retrieve many person nodes in one round-trip, keyed by entity_id."""
+        if not entity_ids:
+            return {}
+        query = """
+        UNWIND $entity_ids AS entity_id
+        MATCH (p:Person {entity_id: entity_id})
+        WITH entity_id, head(collect(p)) AS p
+        RETURN entity_id, p.name AS name, p.title AS title, p.company AS company, p.region AS region
+        """
+        with self._session() as session:
+            result = session.run(query, entity_ids=list(dict.fromkeys(entity_ids)))
+            return {
+                record["entity_id"]: {
+                    "name": record["name"], "title": record["title"],
+                    "company": record["company"], "region": record["region"],
+                }
+                for record in result
+            }
+
     def get_project_by_id(self, project_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a project node by ID."""
         query = """
@@ -33,7 +61,7 @@ class Neo4jDAO:
                collect(DISTINCT p.name) AS platforms
         LIMIT 1
         """
-        with self.driver.session() as session:
+        with self._session() as session:
             result = session.run(query, project_id=project_id)
             record = result.single()
             if record:
@@ -50,6 +78,6 @@ class Neo4jDAO:
                t.name AS talent_name, c.name AS company_name
         LIMIT 20
         """
-        with self.driver.session() as session:
+        with self._session() as session:
             result = session.run(query, platform_name=platform_name)
             return [dict(record) for record in result]
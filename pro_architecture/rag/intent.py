@@ -1,21 +1,34 @@
 from __future__ import annotations
+import re
+
+# Checked in priority order: the first intent with any keyword in the question wins
+_INTENT_KEYWORDS = [
+    ("pitch", ["pitch", "where should i", "who should i pitch"]),
+    ("trend", ["trend", "greenlight", "what's hot", "buying"]),
+    ("person", ["executive", "who is", "person", "profile"]),
+    ("deal", ["deal", "overall deal", "first-look"]),
+    ("comparison", ["vs", "versus", "compare", "difference between"]),
+]
+_KEYWORD_INTENT = {
+    word: (rank, intent)
+    for rank, (intent, words) in enumerate(_INTENT_KEYWORDS)
+    for word in words
+}
+# Zero-width lookahead so overlapping keywords are all reported in one pass
+_INTENT_RE = re.compile(
+    "(?=(" + "|".join(re.escape(w) for w in _KEYWORD_INTENT) + "))"
+)
 
 def classify(question: str) -> str:
     """
     Lightweight intent classification.
     Returns one of: 'pitch', 'trend', 'person', 'deal', 'comparison', 'general'
     """
-    q = question.lower()
-    
-    if any(w in q for w in ["pitch", "where should i", "who should i pitch"]):
-        return "pitch"
-    elif any(w in q for w in ["trend", "greenlight", "what's hot", "buying"]):
-        return "trend"
-    elif any(w in q for w in ["executive", "who is", "person", "profile"]):
-        return "person"
-    elif any(w in q for w in ["deal", "overall deal", "first-look"]):
-        return "deal"
-    elif any(w in q for w in ["vs", "versus", "compare", "difference between"]):
-        return "comparison"
-    else:
-        return "general"
+    best_rank, best_intent = len(_INTENT_KEYWORDS), "general"
+    for match in _INTENT_RE.finditer(question.lower()):
+        rank, intent = _KEYWORD_INTENT[match.group(1)]
+        if rank < best_rank:
+            best_rank, best_intent = rank, intent
+            if rank == 0:
+                break
+    return best_intent
@@ -1,6 +1,11 @@
 from __future__ import annotations
+import hashlib, threading
 from typing import List, Dict, Any, Optional
 from config import S
+from rag.cache import TTLCache
+
+# Same question over the same candidates during a burst -> same ranking
+_rerank_cache = TTLCache(max_items=S.RERANK_CACHE_MAX, ttl_sec=S.RERANK_CACHE_TTL)
 
 class CohereReranker:
     def __init__(self):
@@ -11,23 +16,41 @@ class CohereReranker:
         """Rerank texts using Cohere Rerank API."""
         if not texts:
             return []
+        top_n = min(top_n, len(texts))
+        # Literal (fully quoted) lookups: keep the vector order, no API call
+        q = query.strip()
+        if len(q) > 1 and q[0] == q[-1] == '"':
+            return [{"index": i, "score": None} for i in range(top_n)]
+        key = (
+            hashlib.blake2b(query.encode("utf-8"), digest_size=16).digest(),
+            tuple(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest() for t in texts),
+            top_n,
+        )
+        cached = _rerank_cache.get(key)
+        if cached is not None:
+            return [dict(r) for r in cached]
         response = self.client.rerank(
             model="rerank-english-v3.0",
             query=query,
             documents=texts,
-            top_n=min(top_n, len(texts))
+            top_n=top_n
         )
-        return [{"index": r.index, "score": r.relevance_score} for r in response.results]
+        ranks = [{"index": r.index, "score": r.relevance_score} for r in response.results]
+        _rerank_cache.set(key, ranks)
+        return [dict(r) for r in ranks]
 
 _reranker: Optional[Any] = None
+_reranker_lock = threading.Lock()
 
 def get_reranker():
     global _reranker
     if _reranker is None:
-        if S.RERANKER == "cohere":
-            _reranker = CohereReranker()
-        elif S.RERANKER == "none":
-            _reranker = None
-        else:
-            raise ValueError(f"Unknown RERANKER: {S.RERANKER}")
+        with _reranker_lock:
+            if _reranker is None:
+                if S.RERANKER == "cohere":
+                    _reranker = CohereReranker()
+                elif S.RERANKER == "none":
+                    _reranker = None
+                else:
+                    raise ValueError(f"Unknown RERANKER: {S.RERANKER}")
     return _reranker
@@ -1,24 +1,92 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pinecone import Pinecone
 from config import S
 from rag.embedder import get_embedder
 
+try:
+    from pinecone.grpc import PineconeGRPC
+except ImportError:  # needs the pinecone-client[grpc] extra
+    PineconeGRPC = None
+
 class PineconeRetriever:
     def __init__(self):
-        self.pc = Pinecone(api_key=S.PINECONE_API_KEY)
-        self.index = self.pc.Index(S.PINECONE_INDEX)
+        if S.PINECONE_GRPC and PineconeGRPC is not None:
+            # One HTTP/2 channel multiplexes every query and upsert, with protobuf payloads
+            self.pc = PineconeGRPC(api_key=S.PINECONE_API_KEY)
+            self.index = self.pc.Index(S.PINECONE_INDEX)
+        else:
+            self.pc = Pinecone(api_key=S.PINECONE_API_KEY)
+            # pool_threads backs async_req, so upsert chunks can be in flight together
+            self.index = self.pc.Index(S.PINECONE_INDEX, pool_threads=S.PINECONE_POOL_THREADS)
         self.embedder = get_embedder()
 
-    def query(self, text: str, top_k: int = 10, namespace: str = "") -> List[Dict[str, Any]]:
+    def query(self, text: str, top_k: int = 10, namespace: str = "",
+              filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Query Pinecone with text and return top-k results."""
-        vec = self.embedder.embed_one(text)
-        res = self.index.query(vector=vec, top_k=top_k, include_metadata=True, namespace=namespace)
+        return self.query_vector(self.embedder.embed_one(text), top_k=top_k, namespace=namespace, filter=filter)
+
+    def query_vector(self, vec: List[float], top_k: int = 10, namespace: str = "",
+                     filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Query Pinecone with an already-computed embedding.
+
+        Scope a search with a metadata filter (e.g. {"namespace_tag": {"$in": [...]}})
+        in one namespace rather than fanning out one query per namespace.
+        """
+        res = self.index.query(vector=vec, top_k=top_k, include_metadata=True, namespace=namespace, filter=filter)
+        return self._format_matches(res.get("matches", []))
+
+    @staticmethod
+    def _format_matches(matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Cut long texts once here so dedup, rerank and prompt building never carry 50 KB strings
+        max_chars = S.SNIPPET_MAX_CHARS
         hits = []
-        for m in res.get("matches", []):
+        for m in matches:
+            meta = m.get("metadata") or {}
+            text = meta.get("text")
+            if text and len(text) > max_chars:
+                meta = {**meta, "text": text[:max_chars]}
             hits.append({
                 "id": m.get("id"),
                 "score": m.get("score", 0.0),
-                "metadata": m.get("metadata", {})
+                "metadata": meta
             })
         return hits
+
+    def upsert_batch(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        namespace: str = "",
+        batch_size: int = 100,
+    ) -> int:
+        """
+        Upsert many vectors, sending batch_size vectors per request.
+
+        Requests run in parallel on the index's thread pool. Every chunk is
+        awaited before any failure is raised, so one bad chunk doesn't abandon
+        the others mid-flight. Returns the number of vectors upserted.
+        """
+        records = list(zip(ids, vectors, metadatas))
+        chunks = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+        pending = [
+            self.index.upsert(vectors=chunk, namespace=namespace, async_req=True)
+            for chunk in chunks
+        ]
+        upserted = 0
+        errors = []
+        for result in pending:
+            try:
+                # gRPC returns a future, REST a thread-pool ApplyResult
+                response = result.result() if hasattr(result, "result") else result.get()
+                upserted += response.upserted_count
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)} of {len(chunks)} Pinecone upsert requests failed "
+                f"({upserted} vectors upserted): {errors[0]}"
+            ) from errors[0]
+        return upserted
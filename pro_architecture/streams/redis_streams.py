@@ -5,28 +5,78 @@ Handles event publishing and consumption for async processing
 
 import json
 import time
-from typing import Dict, Any, Optional, List
-from redis import Redis
+from typing import Dict, Any, Optional, List, Set, Tuple
+from redis import BlockingConnectionPool, Redis
+from redis.exceptions import ResponseError
 import os
 
 
+def _encode_ids(entity_ids: List[str]) -> str:
+    """Comma-join string IDs (UUIDs/slugs); JSON for anything that wouldn't round-trip"""
+    if any(not isinstance(i, str) or ',' in i or i.startswith('[') for i in entity_ids):
+        return json.dumps(entity_ids)
+    return ','.join(entity_ids)
+
+
+def _decode_ids(value: str) -> List[str]:
+    if value.startswith('['):
+        return json.loads(value)
+    return value.split(',') if value else []
+
+
 class RedisStreamsClient:
     """Client for publishing and consuming events via Redis Streams"""
     
     def __init__(self):
         """Initialize Redis connection using environment variables"""
-        self.redis = Redis(
+        # Bounded pool shared by all request threads; waits for a free
+        # connection instead of opening one per concurrent publisher
+        self.redis = Redis(connection_pool=BlockingConnectionPool(
             host=os.getenv('REDIS_HOST'),
             port=int(os.getenv('REDIS_PORT', 6379)),
             password=os.getenv('REDIS_PASSWORD'),
             db=int(os.getenv('REDIS_DB', 0)),
-            decode_responses=True
-        )
+            decode_responses=True,
+            max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 32)),
+            timeout=5
+        ))
         
         # Stream names
         self.QUERY_SIGNAL_STREAM = 'mandate_wizard:query_signals'
         self.UPDATE_REQUEST_STREAM = 'mandate_wizard:update_requests'
         
+        # (stream, group) pairs known to exist, so XGROUP CREATE runs once each
+        self._groups_ensured: Set[Tuple[str, str]] = set()
+    
+    def _ensure_group(self, stream: str, consumer_group: str):
+        """Create the consumer group (and stream) unless already done here"""
+        if (stream, consumer_group) in self._groups_ensured:
+            return
+        try:
+            self.redis.xgroup_create(stream, consumer_group, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+            # Group already exists
+        self._groups_ensured.add((stream, consumer_group))
+    
+    def _read_group(self, stream: str, consumer_group: str, consumer_name: str,
+                    count: int, block_ms: int):
+        """XREADGROUP new events, recreating the group if the stream was deleted"""
+        self._ensure_group(stream, consumer_group)
+        try:
+            return self.redis.xreadgroup(
+                consumer_group, consumer_name, {stream: '>'}, count=count, block=block_ms
+            )
+        except ResponseError as e:
+            if 'NOGROUP' not in str(e):
+                raise
+            self._groups_ensured.discard((stream, consumer_group))
+            self._ensure_group(stream, consumer_group)
+            return self.redis.xreadgroup(
+                consumer_group, consumer_name, {stream: '>'}, count=count, block=block_ms
+            )
+        
     def publish_query_signal(self, entity_id: str, entity_type: str, 
                             query: str, user_id: Optional[str] = None) -> str:
         """
@@ -41,24 +91,54 @@ class RedisStreamsClient:
         Returns:
             Event ID from Redis Streams
         """
-        event_data = {
-            'event_type': 'query_signal',
-            'entity_id': entity_id,
-            'entity_type': entity_type,
-            'query': query,
-            'user_id': user_id or 'anonymous',
-            'timestamp': int(time.time())
-        }
-        
         # Publish to Redis Streams
         event_id = self.redis.xadd(
             self.QUERY_SIGNAL_STREAM,
-            event_data,
+            self._query_signal_event(entity_id, entity_type, query, user_id),
             maxlen=10000  # Keep last 10k events
         )
         
         return event_id
     
+    def publish_query_signals(self, entities: List[Dict[str, str]],
+                              query: str, user_id: Optional[str] = None) -> List[str]:
+        """
+        Publish a QuerySignal event for each of several entities at once
+        
+        All XADDs go out in one pipelined round-trip rather than one each.
+        
+        Args:
+            entities: Dicts with 'entity_id' and 'entity_type'
+            query: The user's original query text
+            user_id: Optional user identifier
+            
+        Returns:
+            Event IDs from Redis Streams, in input order
+        """
+        if not entities:
+            return []
+        with self.redis.pipeline(transaction=False) as pipe:
+            for entity in entities:
+                pipe.xadd(
+                    self.QUERY_SIGNAL_STREAM,
+                    self._query_signal_event(
+                        entity['entity_id'], entity['entity_type'], query, user_id
+                    ),
+                    maxlen=10000  # Keep last 10k events
+                )
+            return pipe.execute()
+    
+    def _query_signal_event(self, entity_id: str, entity_type: str,
+                            query: str, user_id: Optional[str]) -> Dict[str, Any]:
+        return {
+            'event_type': 'query_signal',
+            'entity_id': entity_id,
+            'entity_type': entity_type,
+            'query': query,
+            'user_id': user_id or 'anonymous',
+            'timestamp': int(time.time())
+        }
+    
     def publish_update_request(self, entity_ids: List[str], 
                                operation: str, source: str) -> str:
         """
@@ -74,7 +154,7 @@ class RedisStreamsClient:
         """
         event_data = {
             'event_type': 'update_request',
-            'entity_ids': json.dumps(entity_ids),
+            'entity_ids': _encode_ids(entity_ids),
             'operation': operation,
             'source': source,
             'timestamp': int(time.time())
@@ -103,25 +183,9 @@ class RedisStreamsClient:
         Returns:
             List of events with their IDs and data
         """
-        # Ensure consumer group exists
-        try:
-            self.redis.xgroup_create(
-                self.QUERY_SIGNAL_STREAM,
-                consumer_group,
-                id='0',
-                mkstream=True
-            )
-        except Exception:
-            # Group already exists
-            pass
-        
-        # Read new events
-        events = self.redis.xreadgroup(
-            consumer_group,
-            consumer_name,
-            {self.QUERY_SIGNAL_STREAM: '>'},
-            count=count,
-            block=block_ms
+        # Read new events (consumer group is created on first use)
+        events = self._read_group(
+            self.QUERY_SIGNAL_STREAM, consumer_group, consumer_name, count, block_ms
         )
         
         # Parse events
@@ -151,25 +215,9 @@ class RedisStreamsClient:
         Returns:
             List of events with their IDs and data
         """
-        # Ensure consumer group exists
-        try:
-            self.redis.xgroup_create(
-                self.UPDATE_REQUEST_STREAM,
-                consumer_group,
-                id='0',
-                mkstream=True
-            )
-        except Exception:
-            # Group already exists
-            pass
-        
-        # Read new events
-        events = self.redis.xreadgroup(
-            consumer_group,
-            consumer_name,
-            {self.UPDATE_REQUEST_STREAM: '>'},
-            count=count,
-            block=block_ms
+        # Read new events (consumer group is created on first use)
+        events = self._read_group(
+            self.UPDATE_REQUEST_STREAM, consumer_group, consumer_name, count, block_ms
         )
         
         # Parse events
@@ -177,9 +225,9 @@ class RedisStreamsClient:
         if events:
             for stream_name, messages in events:
                 for message_id, data in messages:
-                    # Parse entity_ids JSON
+                    # Parse entity_ids (comma-joined, or JSON from older events)
                     if 'entity_ids' in data:
-                        data['entity_ids'] = json.loads(data['entity_ids'])
+                        data['entity_ids'] = _decode_ids(data['entity_ids'])
                     
                     parsed_events.append({
                         'id': message_id,
@@ -22,16 +22,12 @@ class WebSearchFallback:
         - No entities found
         - Short answer (< 100 chars)
         """
-        meta = response.get("meta", {})
-        retrieved = meta.get("retrieved", 0)
-        entities = response.get("entities", [])
-        answer_length = len(response.get("final_answer", ""))
-        
-        return (
-            retrieved < 3 or
-            len(entities) == 0 or
-            answer_length < 100
-        )
+        # Cheapest checks first; each one alone decides a trigger
+        if (response.get("meta") or {}).get("retrieved", 0) < 3:
+            return True
+        if not response.get("entities"):
+            return True
+        return len(response.get("final_answer") or "") < 100
     
     def search_and_supplement(self, question: str, original_response: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -31,6 +31,9 @@ PINECONE_NAMESPACE = "production_companies"
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+EMBED_BATCH_SIZE = 256  # inputs per embeddings request (API limit is 2048)
+UPSERT_BATCH_SIZE = 100  # vectors per Pinecone upsert request
+UPSERT_POOL_THREADS = 30  # upsert requests in flight at once
 
 def load_data():
     """Load production companies from JSON file"""
@@ -68,6 +71,34 @@ def create_embedding_text(company):
     
     return " ".join(text_parts)
 
+def embed_texts(client, texts):
+    """Embed texts with one API request per EMBED_BATCH_SIZE inputs"""
+    embeddings = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        print(f"  Embedding {start + 1}-{start + len(batch)} of {len(texts)}...")
+        resp = client.embeddings.create(model="text-embedding-3-small", input=batch)
+        embeddings.extend(d.embedding for d in sorted(resp.data, key=lambda d: d.index))
+    return embeddings
+
+def upsert_parallel(index, vectors):
+    """Upsert in UPSERT_BATCH_SIZE chunks with all requests in flight at once"""
+    async_results = [
+        index.upsert(vectors=vectors[i:i + UPSERT_BATCH_SIZE], namespace=PINECONE_NAMESPACE, async_req=True)
+        for i in range(0, len(vectors), UPSERT_BATCH_SIZE)
+    ]
+    upserted = 0
+    errors = 0
+    for result in async_results:
+        try:
+            upserted += result.get().upserted_count
+        except Exception as e:
+            errors += 1
+            print(f"  ⚠️  Upsert chunk failed: {e}")
+    if errors:
+        raise RuntimeError(f"{errors} of {len(async_results)} upsert chunks failed")
+    return upserted
+
 def import_to_pinecone(companies):
     """Import production companies to Pinecone"""
     print("\n" + "="*70)
@@ -77,33 +108,33 @@ def import_to_pinecone(companies):
     # Initialize OpenAI and Pinecone
     client = OpenAI()
     pc = pinecone.Pinecone(api_key=PINECONE_API_KEY)
-    index = pc.Index(PINECONE_INDEX)
+    index = pc.Index(PINECONE_INDEX, pool_threads=UPSERT_POOL_THREADS)
+    
+    # Create embedding texts, then embed them in batches instead of one request each
+    texts = [create_embedding_text(company) for company in companies]
+    embeddings = embed_texts(client, texts)
     
     vectors = []
     for i, company in enumerate(companies):
         print(f"\nProcessing {i+1}/{len(companies)}: {company['company_name']}")
         
-        # Create embedding text
-        text = create_embedding_text(company)
+        text = texts[i]
         print(f"  Text: {text[:100]}...")
+        embedding = embeddings[i]
         
-        # Generate embedding
-        embedding = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        ).data[0].embedding
-        
-        # Prepare metadata
+        # Prepare metadata; look the nested dicts up once per company
+        deal = company.get('netflix_relationship', {})
+        submission = company.get('submission_info', {})
         metadata = {
             "company_name": company['company_name'],
             "country": company['country'],
             "specializations": company['specializations'],
-            "has_netflix_deal": company.get('netflix_relationship', {}).get('has_deal', False),
-            "deal_type": company.get('netflix_relationship', {}).get('deal_type', ''),
-            "deal_year": company.get('netflix_relationship', {}).get('deal_year', 0),
-            "primary_executive": company.get('netflix_relationship', {}).get('primary_executive', ''),
-            "website": company.get('submission_info', {}).get('website', ''),
-            "submission_method": company.get('submission_info', {}).get('submission_method', ''),
+            "has_netflix_deal": deal.get('has_deal', False),
+            "deal_type": deal.get('deal_type', ''),
+            "deal_year": deal.get('deal_year', 0),
+            "primary_executive": deal.get('primary_executive', ''),
+            "website": submission.get('website', ''),
+            "submission_method": submission.get('submission_method', ''),
             "notes": company.get('notes', ''),
             "layer": "production_companies"
         }
@@ -121,8 +152,8 @@ def import_to_pinecone(companies):
     
     # Batch upsert to Pinecone
     print(f"\n📤 Upserting {len(vectors)} vectors to Pinecone...")
-    index.upsert(vectors=vectors, namespace=PINECONE_NAMESPACE)
-    print(f"✅ Successfully imported {len(vectors)} production companies to Pinecone")
+    upserted = upsert_parallel(index, vectors)
+    print(f"✅ Successfully imported {upserted} production companies to Pinecone")
 
 def import_to_neo4j(companies):
     """Import production companies to Neo4j"""
@@ -135,6 +166,8 @@ def import_to_neo4j(companies):
     with driver.session() as session:
         for i, company in enumerate(companies):
             print(f"\nProcessing {i+1}/{len(companies)}: {company['company_name']}")
+            deal = company.get('netflix_relationship', {})
+            submission = company.get('submission_info', {})
             
             # Create production company node
             session.run("""
@@ -151,17 +184,17 @@ def import_to_neo4j(companies):
                 name=company['company_name'],
                 country=company['country'],
                 specializations=company['specializations'],
-                has_deal=company.get('netflix_relationship', {}).get('has_deal', False),
-                deal_type=company.get('netflix_relationship', {}).get('deal_type', ''),
-                deal_year=company.get('netflix_relationship', {}).get('deal_year', 0),
-                website=company.get('submission_info', {}).get('website', ''),
-                submission_method=company.get('submission_info', {}).get('submission_method', ''),
+                has_deal=deal.get('has_deal', False),
+                deal_type=deal.get('deal_type', ''),
+                deal_year=deal.get('deal_year', 0),
+                website=submission.get('website', ''),
+                submission_method=submission.get('submission_method', ''),
                 notes=company.get('notes', '')
             )
             print(f"  ✅ Created ProductionCompany node")
             
             # Link to primary executive
-            primary_exec = company.get('netflix_relationship', {}).get('primary_executive')
+            primary_exec = deal.get('primary_executive')
             if primary_exec:
                 result = session.run("""
                     MATCH (e:Executive {name: $exec_name})
@@ -173,7 +206,7 @@ def import_to_neo4j(companies):
                 """,
                     exec_name=primary_exec,
                     company_name=company['company_name'],
-                    since=company.get('netflix_relationship', {}).get('deal_year', 0)
+                    since=deal.get('deal_year', 0)
                 )
                 
                 if result.single():
@@ -182,7 +215,7 @@ def import_to_neo4j(companies):
                     print(f"  ⚠️  Executive not found: {primary_exec}")
             
             # Link to secondary executives
-            secondary_execs = company.get('netflix_relationship', {}).get('secondary_executives', [])
+            secondary_execs = deal.get('secondary_executives', [])
             for exec_name in secondary_execs:
                 result = session.run("""
                     MATCH (e:Executive {name: $exec_name})
@@ -33,6 +33,9 @@ PINECONE_NAMESPACE = "greenlights"
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "password")
+EMBED_BATCH_SIZE = 256  # inputs per embeddings request (API limit is 2048)
+UPSERT_BATCH_SIZE = 100  # vectors per Pinecone upsert request
+UPSERT_POOL_THREADS = 30  # upsert requests in flight at once
 
 def load_data():
     """Load greenlights from JSON file"""
@@ -70,6 +73,34 @@ def create_embedding_text(greenlight):
     
     return " ".join(text_parts)
 
+def embed_texts(client, texts):
+    """Embed texts with one API request per EMBED_BATCH_SIZE inputs"""
+    embeddings = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start:start + EMBED_BATCH_SIZE]
+        print(f"  Embedding {start + 1}-{start + len(batch)} of {len(texts)}...")
+        resp = client.embeddings.create(model="text-embedding-3-small", input=batch)
+        embeddings.extend(d.embedding for d in sorted(resp.data, key=lambda d: d.index))
+    return embeddings
+
+def upsert_parallel(index, vectors):
+    """Upsert in UPSERT_BATCH_SIZE chunks with all requests in flight at once"""
+    async_results = [
+        index.upsert(vectors=vectors[i:i + UPSERT_BATCH_SIZE], namespace=PINECONE_NAMESPACE, async_req=True)
+        for i in range(0, len(vectors), UPSERT_BATCH_SIZE)
+    ]
+    upserted = 0
+    errors = 0
+    for result in async_results:
+        try:
+            upserted += result.get().upserted_count
+        except Exception as e:
+            errors += 1
+            print(f"  ⚠️  Upsert chunk failed: {e}")
+    if errors:
+        raise RuntimeError(f"{errors} of {len(async_results)} upsert chunks failed")
+    return upserted
+
 def import_to_pinecone(greenlights):
     """Import greenlights to Pinecone"""
     print("\n" + "="*70)
@@ -79,21 +110,19 @@ def import_to_pinecone(greenlights):
     # Initialize OpenAI and Pinecone
     client = OpenAI()
     pc = pinecone.Pinecone(api_key=PINECONE_API_KEY)
-    index = pc.Index(PINECONE_INDEX)
+    index = pc.Index(PINECONE_INDEX, pool_threads=UPSERT_POOL_THREADS)
+    
+    # Create embedding texts, then embed them in batches instead of one request each
+    texts = [create_embedding_text(greenlight) for greenlight in greenlights]
+    embeddings = embed_texts(client, texts)
     
     vectors = []
     for i, greenlight in enumerate(greenlights):
         print(f"\nProcessing {i+1}/{len(greenlights)}: {greenlight['project_title']}")
         
-        # Create embedding text
-        text = create_embedding_text(greenlight)
+        text = texts[i]
         print(f"  Text: {text[:100]}...")
-        
-        # Generate embedding
-        embedding = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        ).data[0].embedding
+        embedding = embeddings[i]
         
         # Prepare metadata
         metadata = {
@@ -129,8 +158,8 @@ def import_to_pinecone(greenlights):
     
     # Batch upsert to Pinecone
     print(f"\n📤 Upserting {len(vectors)} vectors to Pinecone...")
-    index.upsert(vectors=vectors, namespace=PINECONE_NAMESPACE)
-    print(f"✅ Successfully imported {len(vectors)} greenlights to Pinecone")
+    upserted = upsert_parallel(index, vectors)
+    print(f"✅ Successfully imported {upserted} greenlights to Pinecone")
 
 def import_to_neo4j(greenlights):
     """Import greenlights to Neo4j"""
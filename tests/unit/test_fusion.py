@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Unit Test: RAG fusion top-k selection
+
+Verifies that the NumPy top-k used by mmr() returns exactly what the
+original sorted(..., reverse=True)[:k] did, including the order of ties.
+"""
+
+import os
+import sys
+import random
+
+import numpy as np
+import pytest
+
+# Add pro_architecture to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../pro_architecture'))
+
+from rag.fusion import _top_k_indices, mmr
+
+
+def reference_top_k(scores, k):
+    return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
+
+
+@pytest.mark.parametrize('scores', [
+    [0.9, 0.1, 0.5, 0.7, 0.3],
+    [0.5, 0.5, 0.5, 0.5],
+    [0.2, 0.8, 0.8, 0.1, 0.8, 0.5, 0.8],
+    [1.0, 0.3, 0.3, 0.3, 0.0, 0.3],
+    [0.0],
+])
+def test_top_k_indices_matches_sorted(scores):
+    arr = np.array(scores, dtype=np.float64)
+    for k in range(1, len(scores) + 2):
+        assert _top_k_indices(arr, k).tolist() == reference_top_k(scores, k)
+
+
+def test_top_k_indices_random_ties():
+    rng = random.Random(7)
+    for _ in range(200):
+        n = rng.randint(1, 40)
+        # Few distinct values, so most cut-offs land inside a tie group
+        scores = [rng.choice([0.0, 0.25, 0.5, 0.75, 1.0]) for _ in range(n)]
+        k = rng.randint(1, n + 3)
+        assert _top_k_indices(np.array(scores), k).tolist() == reference_top_k(scores, k)
+
+
+def test_mmr_matches_sorted_on_near_equal_scores():
+    # Distinct as Python floats but equal once rounded to float32
+    items = [{'id': str(i), 'score': 0.8 + i * 1e-9} for i in range(5)]
+    items += [{'id': 'missing'}, {'id': 'low', 'score': 0.1}]
+    expected = sorted(items, key=lambda x: x.get('score', 0), reverse=True)[:3]
+    assert mmr(items, top_k=3) == expected
+
+
+def test_mmr_empty_and_non_positive_k():
+    assert mmr([], top_k=5) == []
+    assert mmr([{'id': 'a', 'score': 1.0}], top_k=0) == []
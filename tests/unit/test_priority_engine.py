@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Unit Test: vectorized priority scoring
+
+Regression test that PriorityEngine._score_entities/_rank agree with the
+per-entity calculate_priority_score/classify_priority path used by
+/api/priority/entity/<id>, including missing timestamps, zero query
+counts and ties at the top-k cut-off.
+"""
+
+import math
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Add pro_architecture to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../pro_architecture'))
+
+from prioritization import priority_engine as pe_module
+from prioritization.priority_engine import PriorityEngine
+
+NOW = datetime(2025, 10, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class FrozenDatetime(datetime):
+    """datetime with a fixed now(), so both paths score against the same clock"""
+    @classmethod
+    def now(cls, tz=None):
+        return NOW if tz else NOW.replace(tzinfo=None)
+
+
+@pytest.fixture(params=['pandas', 'python'])
+def engine(request, monkeypatch):
+    monkeypatch.setattr(pe_module, 'datetime', FrozenDatetime)
+    if request.param == 'python':
+        monkeypatch.setattr(pe_module, 'pd', None)
+    elif pe_module.pd is None:
+        pytest.skip("pandas not installed")
+    return PriorityEngine()
+
+
+def ago(days, fmt='iso'):
+    value = NOW - timedelta(days=days)
+    if fmt == 'iso':
+        return value.isoformat()
+    if fmt == 'z':
+        return value.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return value
+
+
+def make_entities():
+    entities = [
+        # Missing timestamps (None and empty string) -> NaN ages
+        {'id': 'no-timestamps', 'demand_score': 5, 'query_count': 3},
+        {'id': 'null-updated', 'demand_score': 12, 'query_count': 1,
+         'updated_at': None, 'last_queried_at': ago(0.5)},
+        {'id': 'empty-strings', 'demand_score': None, 'query_count': None,
+         'last_updated_at': '', 'last_queried_at': ''},
+        {'id': 'never-queried', 'demand_score': 0, 'query_count': 0,
+         'updated_at': ago(10), 'last_queried_at': None},
+        # query_count == 0 zeroes the trending component even when recent
+        {'id': 'zero-count-recent', 'demand_score': 40, 'query_count': 0,
+         'updated_at': ago(45), 'last_queried_at': ago(0.1)},
+        # last_updated_at takes precedence over updated_at
+        {'id': 'both-updated', 'demand_score': 3, 'query_count': 2,
+         'last_updated_at': ago(2), 'updated_at': ago(90), 'last_queried_at': ago(3)},
+        # Timestamp formats: Z suffix, aware and naive datetimes
+        {'id': 'z-suffix', 'demand_score': 100, 'query_count': 8,
+         'updated_at': ago(31, 'z'), 'last_queried_at': ago(6, 'z')},
+        {'id': 'aware-dt', 'demand_score': 9, 'query_count': 4,
+         'updated_at': ago(29, 'dt'), 'last_queried_at': ago(20, 'dt')},
+        {'id': 'naive-dt', 'demand_score': 10, 'query_count': 2,
+         'updated_at': ago(30, 'dt').replace(tzinfo=None),
+         'last_queried_at': ago(45, 'dt').replace(tzinfo=None)},
+        # Trending boundaries at exactly 1, 7 and 30 days
+        {'id': 'queried-1d', 'demand_score': 1, 'query_count': 1,
+         'updated_at': ago(5), 'last_queried_at': ago(1)},
+        {'id': 'queried-7d', 'demand_score': 1, 'query_count': 1,
+         'updated_at': ago(5), 'last_queried_at': ago(7)},
+        {'id': 'queried-30d', 'demand_score': 1, 'query_count': 1,
+         'updated_at': ago(5), 'last_queried_at': ago(30)},
+        # Very stale and very popular
+        {'id': 'ancient', 'demand_score': 5000, 'query_count': 900,
+         'updated_at': ago(400), 'last_queried_at': ago(0)},
+    ]
+    # Identical entities, so several share the score at any top-k cut-off
+    for i in range(6):
+        entities.append({'id': f'tie-{i}', 'demand_score': 2, 'query_count': 1,
+                         'updated_at': ago(12), 'last_queried_at': ago(4)})
+    return entities
+
+
+def reference_scores(engine, entities):
+    """Per-entity scores and tier names, as the single-entity endpoint computes them"""
+    scores, tiers = [], []
+    for entity in entities:
+        ctx = engine._precompute(entity)
+        score = engine.calculate_priority_score(entity, ctx)
+        scores.append(score)
+        tiers.append(engine.classify_priority(entity, ctx, score).name)
+    return scores, tiers
+
+
+def test_score_entities_matches_per_entity_path(engine):
+    entities = make_entities()
+    expected_scores, expected_tiers = reference_scores(engine, entities)
+    
+    scores, tiers = engine._score_entities(entities)
+    
+    assert scores.tolist() == pytest.approx(expected_scores, abs=1e-9)
+    assert tiers.tolist() == expected_tiers
+
+
+def test_missing_timestamps_and_zero_query_count(engine):
+    entities = make_entities()
+    by_id = dict(zip((e['id'] for e in entities), zip(*engine._score_entities(entities))))
+    
+    # No update timestamp = assume very old (freshness 100), never queried = 0 trending
+    assert by_id['no-timestamps'][0] == round(0.5 * math.log10(5 + 1) * 20 + 0.3 * 100, 2)
+    assert by_id['empty-strings'][0] == 30.0
+    # Stale-by-default entities are never CRITICAL without a timestamp
+    assert by_id['null-updated'][1] != 'CRITICAL'
+    # Recent query but query_count == 0 -> no trending component
+    zero = next(e for e in entities if e['id'] == 'zero-count-recent')
+    ctx = engine._precompute(zero)
+    assert engine._calculate_trending_score(ctx) == 0.0
+    assert by_id['zero-count-recent'][0] == engine.calculate_priority_score(zero)
+
+
+@pytest.mark.parametrize('top_k', [None, 1, 3, 8, 9, 12, 15, 19, 50])
+def test_rank_matches_stable_sort(engine, top_k):
+    entities = make_entities()
+    expected_scores, expected_tiers = reference_scores(engine, entities)
+    order = sorted(range(len(entities)), key=lambda i: expected_scores[i], reverse=True)
+    if top_k is not None:
+        order = order[:top_k]
+    
+    ranked = engine._rank(entities, top_k=top_k)
+    
+    assert [e['id'] for e in ranked] == [entities[i]['id'] for i in order]
+    assert [e['priority_score'] for e in ranked] == pytest.approx([expected_scores[i] for i in order], abs=1e-9)
+    assert [e['priority_tier'] for e in ranked] == [expected_tiers[i] for i in order]
+
+
+def test_rank_ties_at_cutoff_keep_input_order(engine):
+    entities = make_entities()
+    scores, _ = engine._score_entities(entities)
+    tie_ids = [e['id'] for e in entities if e['id'].startswith('tie-')]
+    tie_score = scores[[e['id'] for e in entities].index('tie-0')]
+    above = int((scores > tie_score).sum())
+    
+    # Cut the tie group in the middle: the earliest ties must win, in input order
+    ranked = engine._rank(entities, top_k=above + 3)
+    
+    assert [e['id'] for e in ranked[above:]] == tie_ids[:3]
+
+
+@pytest.mark.parametrize('tiers', [['CRITICAL'], ['CRITICAL', 'HIGH'], ['MEDIUM', 'LOW', 'DEFERRED']])
+@pytest.mark.parametrize('top_k', [None, 2, 5])
+def test_rank_tier_filter_matches_per_entity_path(engine, tiers, top_k):
+    entities = make_entities()
+    expected_scores, expected_tiers = reference_scores(engine, entities)
+    order = sorted(
+        (i for i in range(len(entities)) if expected_tiers[i] in tiers),
+        key=lambda i: expected_scores[i], reverse=True
+    )
+    if top_k is not None:
+        order = order[:top_k]
+    
+    ranked = engine._rank(entities, top_k=top_k, tiers=tiers)
+    
+    assert [e['id'] for e in ranked] == [entities[i]['id'] for i in order]
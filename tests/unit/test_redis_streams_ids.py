@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Unit Test: Redis Streams entity ID encoding
+
+Verifies that _encode_ids/_decode_ids round-trip every ID list the
+QuerySignal publisher can produce, and still read events written
+before the comma-joined format (JSON arrays).
+"""
+
+import os
+import sys
+import json
+
+import pytest
+
+# Add pro_architecture to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../pro_architecture'))
+
+from streams.redis_streams import _encode_ids, _decode_ids
+
+
+@pytest.mark.parametrize("entity_ids", [
+    ["e76f6ab7-e396-46e3-be5b-704750ec703c"],
+    ["e76f6ab7-e396-46e3-be5b-704750ec703c", "chris-mansolillo", "netflix"],
+    ["a", "", "b"],
+])
+def test_comma_free_ids_are_comma_joined(entity_ids):
+    encoded = _encode_ids(entity_ids)
+    assert encoded == ",".join(entity_ids)
+    assert _decode_ids(encoded) == entity_ids
+
+
+@pytest.mark.parametrize("entity_ids", [
+    ["warner bros, discovery"],
+    ["netflix", "a,b", "c"],
+    [",", ",,"],
+])
+def test_ids_with_commas_round_trip(entity_ids):
+    assert _decode_ids(_encode_ids(entity_ids)) == entity_ids
+
+
+@pytest.mark.parametrize("entity_ids", [
+    ["[bracketed"],
+    ["netflix", "[x]"],
+    ["[]"],
+])
+def test_ids_starting_with_bracket_round_trip(entity_ids):
+    assert _decode_ids(_encode_ids(entity_ids)) == entity_ids
+
+
+def test_empty_list_round_trips():
+    assert _encode_ids([]) == ""
+    assert _decode_ids(_encode_ids([])) == []
+
+
+@pytest.mark.parametrize("entity_ids", [
+    [],
+    ["e76f6ab7-e396-46e3-be5b-704750ec703c"],
+    ["netflix", "hbo-max"],
+    ["a,b", "[c"],
+])
+def test_legacy_json_events_decode(entity_ids):
+    # Events published before the comma-joined format stored json.dumps(ids)
+    assert _decode_ids(json.dumps(entity_ids)) == entity_ids
@@ -47,45 +47,69 @@ print("=" * 70)
 
 updated_count = 0
 relationship_count = 0
+BATCH_SIZE = 1000  # rows per UNWIND statement
+
+# Build every row up front, then update a page of mandates per round-trip
+rows = []
+for record in all_healed_records:
+    name = record["name"]
+    enriched_data = record["enriched_data"]
+    try:
+        rows.append({
+            "name": name,
+            "executive": enriched_data.get("executive"),
+            "title": enriched_data.get("title"),
+            "genre": enriched_data.get("genre"),
+            "logline": enriched_data.get("logline"),
+            "status": enriched_data.get("status"),
+            "quality_score": record["quality"]["score"],
+            "relationships": len(record.get("relationships", [])),
+        })
+    except Exception as e:
+        print(f"  ⚠️  Error updating {name}: {e}")
+
+UPDATE_MANDATES = """
+    UNWIND $rows AS row
+    MATCH (m:Mandate {name: row.name})
+    SET m.executive = row.executive,
+        m.title = row.title,
+        m.genre = row.genre,
+        m.logline = row.logline,
+        m.status = row.status,
+        m.last_updated = datetime(),
+        m.quality_score = row.quality_score
+    RETURN count(m) AS updated
+"""
+
+
+def update_batch(session, batch):
+    """Update a page of mandates, bisecting it on failure so one bad row only
+    loses itself. Returns (nodes matched, relationships for the rows applied)."""
+    try:
+        updated = session.run(UPDATE_MANDATES, rows=batch).single()["updated"]
+        return updated, sum(row["relationships"] for row in batch)
+    except Exception as e:
+        if len(batch) == 1:
+            print(f"  ⚠️  Error updating {batch[0]['name']}: {e}")
+            return 0, 0
+        mid = len(batch) // 2
+        left = update_batch(session, batch[:mid])
+        right = update_batch(session, batch[mid:])
+        return left[0] + right[0], left[1] + right[1]
+
 
 with driver.session() as session:
-    for record in all_healed_records:
-        name = record["name"]
-        enriched_data = record["enriched_data"]
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        # Update Mandate nodes with enriched data; count(m) so rows whose
+        # mandate no longer exists aren't reported as updated
+        updated, relationships = update_batch(session, batch)
+        updated_count += updated
+        
+        # Create relationships
+        relationship_count += relationships
         
-        try:
-            # Update Mandate node with enriched data
-            session.run("""
-                MATCH (m:Mandate {name: $name})
-                SET m.executive = $executive,
-                    m.title = $title,
-                    m.genre = $genre,
-                    m.logline = $logline,
-                    m.status = $status,
-                    m.last_updated = datetime(),
-                    m.quality_score = $quality_score
-                RETURN m
-            """, 
-                name=name,
-                executive=enriched_data.get("executive"),
-                title=enriched_data.get("title"),
-                genre=enriched_data.get("genre"),
-                logline=enriched_data.get("logline"),
-                status=enriched_data.get("status"),
-                quality_score=record["quality"]["score"]
-            )
-            
-            updated_count += 1
-            
-            # Create relationships
-            for rel in record.get("relationships", []):
-                relationship_count += 1
-            
-            if updated_count % 50 == 0:
-                print(f"  Updated {updated_count} mandates...")
-                
-        except Exception as e:
-            print(f"  ⚠️  Error updating {name}: {e}")
+        print(f"  Updated {updated_count} mandates...")
 
 print(f"\n✅ Updated {updated_count} mandates in Neo4j")
 print(f"✅ Created/verified {relationship_count} relationships")
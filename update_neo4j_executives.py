@@ -5,6 +5,7 @@ Reads extraction results and creates GREENLIT relationships
 """
 
 from neo4j import GraphDatabase
+import argparse
 import json
 from typing import List, Dict
 
@@ -51,6 +52,10 @@ def create_greenlit_relationship(session, executive_name: str, greenlight_title:
 
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description='Create GREENLIT relationships from extraction results')
+    parser.add_argument('--summary', action=argparse.BooleanOptionalAction, default=False,
+                        help='Print database-wide GREENLIT statistics (scans every relationship)')
+    args = parser.parse_args()
     
     # Load extraction results
     results = load_extraction_results()
@@ -91,7 +96,15 @@ def main():
                     print(f"  🔗 Created: {exec_name} -[GREENLIT]-> {title}")
                     relationships_created += 1
         
-        # Verify relationships
+        print(f"\n=== UPDATE COMPLETE ===")
+        print(f"Relationships created: {relationships_created}")
+        print(f"Executives found: {executives_found}")
+        print(f"Executives created: {executives_created}")
+        
+        if not args.summary:
+            return
+        
+        # Verify relationships (full scan of every GREENLIT edge, so opt-in)
         with driver.session() as session:
             result = session.run("""
                 MATCH (p:Person)-[r:GREENLIT]->(g:Greenlight)
@@ -101,10 +114,6 @@ def main():
             """)
             stats = result.single()
         
-        print(f"\n=== UPDATE COMPLETE ===")
-        print(f"Relationships created: {relationships_created}")
-        print(f"Executives found: {executives_found}")
-        print(f"Executives created: {executives_created}")
         print(f"\n=== DATABASE STATISTICS ===")
         print(f"Total GREENLIT relationships: {stats['total_relationships']}")
         print(f"Total executives with greenlights: {stats['total_executives']}")